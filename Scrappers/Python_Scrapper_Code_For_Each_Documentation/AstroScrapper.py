@@ -1,12 +1,17 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import pandas as pd
-import time
 import csv
 import tiktoken
+import os
+import sys
+
+# The readiness waits shared by all scrapers live one level up, in Scrappers/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from page_waits import waiter_for
+from static_fetch import StaticFetcher, NOT_MODIFIED
+from crawl_state import CrawlState, state_path_for, previous_csv_rows
 
 def count_tokens(text):
     """Count tokens using tiktoken"""
@@ -28,15 +33,20 @@ def setup_driver():
     options.add_argument('--start-maximized')
     return webdriver.Chrome(options=options)
 
-def get_page_content(driver, url):
+def get_page_content(driver, url, fetcher):
     try:
-        driver.get(url)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='astro-mduiocwh']"))
-        )
-        
-        main_content = driver.find_element(By.CSS_SELECTOR, "div[class*='astro-mduiocwh']")
-        tab_buttons = main_content.find_elements(By.CSS_SELECTOR, "[role='tab']")
+        # Server-rendered pages are read straight from the HTML, where every tab panel
+        # is already present; the browser only loads the rest and clicks through the tabs
+        document, main_content = fetcher.content(url, "div[class*='astro-mduiocwh']")
+        if document is NOT_MODIFIED:
+            return None
+        tab_buttons = []
+        if main_content is None:
+            waiter = waiter_for(driver)
+            main_content = waiter.load(url, "div[class*='astro-mduiocwh']")
+            if main_content is None:
+                raise TimeoutException("main content did not load")
+            tab_buttons = main_content.find_elements(By.CSS_SELECTOR, "[role='tab']")
         content_texts = []
         
         initial_content = main_content.text
@@ -46,7 +56,7 @@ def get_page_content(driver, url):
         for tab in tab_buttons:
             try:
                 driver.execute_script("arguments[0].click();", tab)
-                time.sleep(0.5)
+                waiter.settle()
                 tab_content = main_content.text
                 if tab_content and tab_content not in content_texts:
                     content_texts.append(tab_content)
@@ -61,17 +71,18 @@ def get_page_content(driver, url):
 
 def scrape_astro_docs():
     driver = setup_driver()
+    crawl_state = CrawlState(state_path_for('astro_docs.csv'))
+    # Pages whose HTML already holds the content are read without the browser
+    fetcher = StaticFetcher(state=crawl_state)
     base_url = "https://docs.astro.build"
     results = []
+    previous_rows = previous_csv_rows('astro_docs.csv', crawl_state)
     
     try:
       
-        driver.get(f"{base_url}/en/getting-started/")
-        
-       
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "sidebar-content"))
-        )
+        # Wait for the sidebar to render
+        if waiter_for(driver).load(f"{base_url}/en/getting-started/", "sidebar-content", By.CLASS_NAME) is None:
+            raise TimeoutException("sidebar did not load")
         
         # Get all links from sidebar
         sidebar_links = driver.find_elements(By.CSS_SELECTOR, ".sidebar-content a")
@@ -88,7 +99,12 @@ def scrape_astro_docs():
         
         for url in urls:
             print(f"\nScraping: {url}")
-            content = get_page_content(driver, url)
+            content = get_page_content(driver, url, fetcher)
+            
+            previous_row, content = crawl_state.resolve(url, content, previous_rows, lambda: get_page_content(driver, url, fetcher))
+            if previous_row is not None:
+                results.append(previous_row)
+                continue
             
             token_count = count_tokens(content)
             char_count = count_characters(content)
@@ -103,7 +119,6 @@ def scrape_astro_docs():
                 'char_count': char_count,
                 'techStackName': 'astro'
             })
-            time.sleep(2)
             
         # Custom CSV writing to handle triple quotes
         with open('astro_docs.csv', 'w', newline='', encoding='utf-8') as f:
@@ -124,6 +139,8 @@ def scrape_astro_docs():
         
         print("\nScraping completed! Data saved to astro_docs.csv")
         
+        crawl_state.save()
+        
         # Print summary
         print("\nSummary:")
         print(f"Total pages scraped: {len(results)}")
@@ -140,7 +157,8 @@ def scrape_astro_docs():
             print(f"Tokens: {row['token_count']}")
             
     finally:
-        time.sleep(5)
+        fetcher.summary()
+        waiter_for(driver).summary()
         driver.quit()
 
 if __name__ == "__main__":
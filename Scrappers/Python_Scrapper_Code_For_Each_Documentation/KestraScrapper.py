@@ -1,10 +1,16 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+from selenium.common.exceptions import TimeoutException
 import csv
 import tiktoken
+import os
+import sys
+
+# The readiness waits shared by all scrapers live one level up, in Scrappers/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from page_waits import waiter_for
+from static_fetch import StaticFetcher, NOT_MODIFIED
+from crawl_state import CrawlState, state_path_for, previous_csv_rows
 
 def count_tokens(text):
     """Count tokens using tiktoken"""
@@ -27,16 +33,19 @@ def setup_driver():
     options.add_argument('--start-maximized')
     return webdriver.Chrome(options=options)
 
-def get_page_content(driver, url):
+def get_page_content(driver, url, fetcher):
     try:
         print(f"Navigating to URL: {url}")
-        driver.get(url)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "article.bd-main"))  
-        )
+        # Server-rendered pages are read straight from the HTML; the browser only loads the rest
+        document, main_content = fetcher.content(url, "article.bd-main")
+        if document is NOT_MODIFIED:
+            return None
+        if main_content is None:
+            main_content = waiter_for(driver).load(url, "article.bd-main")
+        if main_content is None:
+            raise TimeoutException("main content did not load")
         
         print("Extracting main content from the page.")
-        main_content = driver.find_element(By.CSS_SELECTOR, "article.bd-main")  
         content_text = main_content.text
         
         print(f"Content extracted from {url}: {content_text[:100]}...")  # to print first 100 characters for preview so that we i can debug
@@ -47,17 +56,18 @@ def get_page_content(driver, url):
 
 def scrape_kestra_docs():
     driver = setup_driver()
+    crawl_state = CrawlState(state_path_for('kestra_docs.csv'))
+    # Pages whose HTML already holds the content are read without the browser
+    fetcher = StaticFetcher(state=crawl_state)
     base_url = "https://kestra.io/docs"
     results = []
+    previous_rows = previous_csv_rows('kestra_docs.csv', crawl_state)
     
     try:
         
-        driver.get(base_url)
-        
-        
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "bd-links"))  # Adjusted selector
-        )
+        # Wait for the sidebar links to render
+        if waiter_for(driver).load(base_url, "bd-links", By.CLASS_NAME) is None:  # Adjusted selector
+            raise TimeoutException("sidebar did not load")
         
         # Get all links from sidebar
         sidebar_links = driver.find_elements(By.CSS_SELECTOR, ".bd-links a")  # Adjusted selector
@@ -74,7 +84,12 @@ def scrape_kestra_docs():
         
         for url in urls:
             print(f"Scraping: {url}")
-            content = get_page_content(driver, url)
+            content = get_page_content(driver, url, fetcher)
+            
+            previous_row, content = crawl_state.resolve(url, content, previous_rows, lambda: get_page_content(driver, url, fetcher))
+            if previous_row is not None:
+                results.append(previous_row)
+                continue
             
             token_count = count_tokens(content)
             char_count = count_characters(content)
@@ -89,7 +104,6 @@ def scrape_kestra_docs():
                 'char_count': char_count,
                 'techStackName': 'kestra'
             })
-            time.sleep(2)
             
         # Custom CSV writing to handle triple quotes
         print("Writing results to CSV file.")
@@ -111,6 +125,8 @@ def scrape_kestra_docs():
         
         print("Scraping completed! Data saved to kestra_docs.csv")
         
+        crawl_state.save()
+        
         # Print summary
         print("Summary:")
         print(f"Total pages scraped: {len(results)}")
@@ -127,8 +143,9 @@ def scrape_kestra_docs():
             print(f"Tokens: {row['token_count']}")
             
     finally:
+        fetcher.summary()
+        waiter_for(driver).summary()
         print("Closing the WebDriver.")
-        time.sleep(5)
         driver.quit()
 
 if __name__ == "__main__":
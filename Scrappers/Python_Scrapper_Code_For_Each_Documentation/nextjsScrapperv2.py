@@ -1,10 +1,16 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+from selenium.common.exceptions import TimeoutException
 import csv
 import tiktoken
+import os
+import sys
+
+# The readiness waits shared by all scrapers live one level up, in Scrappers/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from page_waits import waiter_for
+from static_fetch import StaticFetcher, NOT_MODIFIED
+from crawl_state import CrawlState, state_path_for, previous_csv_rows
 
 def count_tokens(text):
     """Count tokens using tiktoken"""
@@ -27,18 +33,19 @@ def setup_driver():
     options.add_argument('--start-maximized')
     return webdriver.Chrome(options=options)
 
-def get_page_content(driver, url):
+def get_page_content(driver, url, fetcher):
     try:
         print(f"Navigating to URL: {url}")
-        driver.get(url)
-        
-        
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "article[data-docs-container]"))
-        )
+        # Server-rendered pages are read straight from the HTML; the browser only loads the rest
+        document, main_content = fetcher.content(url, "article[data-docs-container]")
+        if document is NOT_MODIFIED:
+            return None
+        if main_content is None:
+            main_content = waiter_for(driver).load(url, "article[data-docs-container]")
+        if main_content is None:
+            raise TimeoutException("main content did not load")
         
         print("Extracting main content from the page.")
-        main_content = driver.find_element(By.CSS_SELECTOR, "article[data-docs-container]")
         content_text = main_content.text
         
         print(f"Content extracted from {url}: {content_text[:100]}...")  # Print first 100 characters for debugging
@@ -49,16 +56,18 @@ def get_page_content(driver, url):
 
 def scrape_nextjs_docs():
     driver = setup_driver()
+    crawl_state = CrawlState(state_path_for('docs_nextjs.csv'))
+    # Pages whose HTML already holds the content are read without the browser
+    fetcher = StaticFetcher(state=crawl_state)
     base_url = "https://nextjs.org/docs/app"
     results = []
+    previous_rows = previous_csv_rows('docs_nextjs.csv', crawl_state)
     
     try:
-        driver.get(base_url)
         
-        
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "nav.styled-scrollbar a"))
-        )
+        # Wait for the sidebar links to render
+        if waiter_for(driver).load(base_url, "nav.styled-scrollbar a") is None:
+            raise TimeoutException("sidebar did not load")
         
         
         sidebar_links = driver.find_elements(By.CSS_SELECTOR, "nav.styled-scrollbar a")
@@ -75,7 +84,12 @@ def scrape_nextjs_docs():
         
         for url in urls:
             print(f"Scraping: {url}")
-            content = get_page_content(driver, url)
+            content = get_page_content(driver, url, fetcher)
+            
+            previous_row, content = crawl_state.resolve(url, content, previous_rows, lambda: get_page_content(driver, url, fetcher))
+            if previous_row is not None:
+                results.append(previous_row)
+                continue
             
             token_count = count_tokens(content)
             char_count = count_characters(content)
@@ -90,7 +104,6 @@ def scrape_nextjs_docs():
                 'char_count': char_count,
                 'techStackName': 'nextjs'
             })
-            time.sleep(2)  
             
        
         print("Writing results to CSV file.")
@@ -112,6 +125,8 @@ def scrape_nextjs_docs():
         
         print("Scraping completed! Data saved to docs_nextjs.csv")
         
+        crawl_state.save()
+        
       
         print("\nScraping Summary:")
         print(f"Total pages scraped: {len(results)}")
@@ -128,8 +143,9 @@ def scrape_nextjs_docs():
             print(f"Tokens: {row['token_count']}")
             
     finally:
+        fetcher.summary()
+        waiter_for(driver).summary()
         print("Closing the WebDriver.")
-        time.sleep(5)
         driver.quit()
 
 if __name__ == "__main__":
@@ -1,10 +1,16 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+from selenium.common.exceptions import TimeoutException
 import csv
 import tiktoken
+import os
+import sys
+
+# The readiness waits shared by all scrapers live one level up, in Scrappers/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from page_waits import waiter_for
+from static_fetch import StaticFetcher, NOT_MODIFIED
+from crawl_state import CrawlState, state_path_for, previous_csv_rows
 
 def count_tokens(text):
     """Count tokens using tiktoken"""
@@ -27,10 +33,9 @@ def setup_driver():
     options.add_argument('--start-maximized')
     return webdriver.Chrome(options=options)
 
-def get_page_content(driver, url):
+def get_page_content(driver, url, fetcher):
     try:
         print(f"Navigating to URL: {url}")
-        driver.get(url)
         
       
         content_selectors = [
@@ -39,16 +44,14 @@ def get_page_content(driver, url):
             "div[role='main']"
         ]
         
-        for selector in content_selectors:
-            try:
-                WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
-                main_content = driver.find_element(By.CSS_SELECTOR, selector)
-                break
-            except:
-                continue
-        else:
+        # Server-rendered pages are read straight from the HTML; the browser only loads the rest
+        document, main_content = fetcher.content(url, content_selectors)
+        if document is NOT_MODIFIED:
+            return None
+        if main_content is None:
+            # Whichever content container the page uses, once it has finished rendering
+            main_content = waiter_for(driver).load(url, content_selectors)
+        if main_content is None:
             print(f"Could not find main content for {url}")
             return ""
         
@@ -85,23 +88,24 @@ def get_page_content(driver, url):
 
 def scrape_react_docs():
     driver = setup_driver()
+    crawl_state = CrawlState(state_path_for('docs_react.csv'))
+    # Pages whose HTML already holds the content are read without the browser
+    fetcher = StaticFetcher(state=crawl_state)
     urls_to_scrape = [
         "https://react.dev/learn/reusing-logic-with-custom-hooks",
         "https://react.dev/reference/react/PureComponent",
         "https://react.dev/community"
     ]
     results = []
+    previous_rows = previous_csv_rows('docs_react.csv', crawl_state)
     
     try:
         for initial_url in urls_to_scrape:
             print(f"Processing section starting at: {initial_url}")
-            driver.get(initial_url)
-            time.sleep(2)
             
           
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "nav[role='navigation']"))
-            )
+            if waiter_for(driver).load(initial_url, "nav[role='navigation']") is None:
+                raise TimeoutException("sidebar did not load")
             
            
             section_urls = []
@@ -135,7 +139,12 @@ def scrape_react_docs():
             
             for url in section_urls:
                 print(f"Scraping: {url}")
-                content = get_page_content(driver, url)
+                content = get_page_content(driver, url, fetcher)
+                
+                previous_row, content = crawl_state.resolve(url, content, previous_rows, lambda: get_page_content(driver, url, fetcher))
+                if previous_row is not None:
+                    results.append(previous_row)
+                    continue
                 
                 token_count = count_tokens(content)
                 char_count = count_characters(content)
@@ -147,7 +156,6 @@ def scrape_react_docs():
                     'char_count': char_count,
                     'techStackName': 'react'
                 })
-                time.sleep(2)  
         
        
         print("Writing results to CSV file.")
@@ -168,6 +176,8 @@ def scrape_react_docs():
         
         print("Scraping completed! Data saved to docs_react.csv")
         
+        crawl_state.save()
+        
         # Print summary
         print("\nScraping Summary:")
         print(f"Total pages scraped: {len(results)}")
@@ -183,8 +193,9 @@ def scrape_react_docs():
             print(f"Tokens: {row['token_count']}")
             
     finally:
+        fetcher.summary()
+        waiter_for(driver).summary()
         print("Closing the WebDriver.")
-        time.sleep(5)
         driver.quit()
 
 if __name__ == "__main__":
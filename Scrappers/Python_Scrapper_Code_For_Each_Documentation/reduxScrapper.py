@@ -1,10 +1,16 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+from selenium.common.exceptions import TimeoutException
 import csv
 import tiktoken
+import os
+import sys
+
+# The readiness waits shared by all scrapers live one level up, in Scrappers/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from page_waits import waiter_for
+from static_fetch import StaticFetcher, NOT_MODIFIED
+from crawl_state import CrawlState, state_path_for, previous_csv_rows
 
 def count_tokens(text):
     """Count tokens using tiktoken"""
@@ -27,18 +33,21 @@ def setup_driver():
     options.add_argument('--start-maximized')
     return webdriver.Chrome(options=options)
 
-def get_page_content(driver, url):
+def get_page_content(driver, url, fetcher):
     try:
         print(f"Navigating to URL: {url}")
-        driver.get(url)
         
-        #  we are just waiting for the main content to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, ".docMainContainer_gTbr article"))
-        )
+        # Server-rendered pages are read straight from the HTML; the browser only loads the rest
+        document, main_content = fetcher.content(url, ".docMainContainer_gTbr article")
+        if document is NOT_MODIFIED:
+            return None
+        if main_content is None:
+            #  we are just waiting for the main content to load
+            main_content = waiter_for(driver).load(url, ".docMainContainer_gTbr article")
+        if main_content is None:
+            raise TimeoutException("main content did not load")
         
         print("Extracting main content from the page.")
-        main_content = driver.find_element(By.CSS_SELECTOR, ".docMainContainer_gTbr article")
         content_text = main_content.text
         
         print(f"Content extracted from {url}: {content_text[:100]}...")  # Print first 100 characters for debugging
@@ -49,19 +58,21 @@ def get_page_content(driver, url):
 
 def scrape_redux_docs():
     driver = setup_driver()
+    crawl_state = CrawlState(state_path_for('docs_redux.csv'))
+    # Pages whose HTML already holds the content are read without the browser
+    fetcher = StaticFetcher(state=crawl_state)
     initial_url = "https://redux.js.org/introduction/getting-started"
     results = []
+    previous_rows = previous_csv_rows('docs_redux.csv', crawl_state)
     
     try:
       
         print(f"Loading initial page: {initial_url}")
-        driver.get(initial_url)
-        time.sleep(2)  
+        waiter = waiter_for(driver)
         
         
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, ".menu__list-item-collapsible"))
-        )
+        if waiter.load(initial_url, ".menu__list-item-collapsible") is None:
+            raise TimeoutException("sidebar did not load")
         
         
         collapsible_items = driver.find_elements(By.CSS_SELECTOR, ".menu__list-item-collapsible a.menu__link--sublist")
@@ -71,11 +82,13 @@ def scrape_redux_docs():
             try:
                 print(f"Clicking menu item: {item.text}")
                 driver.execute_script("arguments[0].click();", item)
-                time.sleep(1)  
             except Exception as e:
                 print(f"Error clicking menu item: {str(e)}")
                 continue
         
+        # Let the expanded menus finish rendering
+        waiter.settle()
+        
       
         sidebar_links = driver.find_elements(By.CSS_SELECTOR, ".menu__list-item a.menu__link:not(.menu__link--sublist)")
         urls = []
@@ -92,7 +105,12 @@ def scrape_redux_docs():
         
         for url in urls:
             print(f"Scraping: {url}")
-            content = get_page_content(driver, url)
+            content = get_page_content(driver, url, fetcher)
+            
+            previous_row, content = crawl_state.resolve(url, content, previous_rows, lambda: get_page_content(driver, url, fetcher))
+            if previous_row is not None:
+                results.append(previous_row)
+                continue
             
             token_count = count_tokens(content)
             char_count = count_characters(content)
@@ -107,7 +125,6 @@ def scrape_redux_docs():
                 'char_count': char_count,
                 'techStackName': 'redux'
             })
-            time.sleep(2)  
             
         
         print("Writing results to CSV file.")
@@ -129,6 +146,8 @@ def scrape_redux_docs():
         
         print("Scraping completed! Data saved to docs_redux.csv")
         
+        crawl_state.save()
+        
         
         print("\nScraping Summary:")
         print(f"Total pages scraped: {len(results)}")
@@ -145,8 +164,9 @@ def scrape_redux_docs():
             print(f"Tokens: {row['token_count']}")
             
     finally:
+        fetcher.summary()
+        waiter_for(driver).summary()
         print("Closing the WebDriver.")
-        time.sleep(5)
         driver.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import os
+import csv
+import json
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+# Per-URL crawl state, so a re-crawl can ask the server whether a page changed
+# (ETag / Last-Modified) and only re-emit pages whose extracted content differs.
+
+def state_path_for(output_filename):
+    """The crawl state file kept next to a scraper's output file"""
+    return os.path.splitext(output_filename)[0] + ".crawl_state.json"
+
+def content_hash(content):
+    return hashlib.sha256(str(content).encode("utf-8")).hexdigest()
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+class CrawlState:
+    """ETag, Last-Modified, content hash and crawl times per URL, in a JSON file.
+
+    Conditional headers are only sent for pages whose content is in the
+    current output (seeded from it or recorded this run), so a page is never
+    skipped as "not modified" without a copy to keep. A page's new hash is
+    only committed by `save`, which is called once the output has been
+    written; `failed` drops a page's validators after a failed fetch so the
+    next run fetches it in full.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.in_output = set()
+        self.pending = {}
+        self.counts = {"changed": 0, "unchanged": 0, "failed": 0}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    self.pages = json.load(file)
+                print(f"Loaded crawl state for {len(self.pages)} URLs from {path}")
+            except Exception as e:
+                print(f"Error reading crawl state {path}: {str(e)}, starting fresh")
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for a page already in the output"""
+        with self.lock:
+            if url not in self.in_output:
+                return {}
+            page = self.pages.get(url) or {}
+        headers = {}
+        if page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
+        return headers
+
+    def record_response(self, url, etag=None, last_modified=None):
+        """Remember the validators of a full (200) response"""
+        with self.lock:
+            page = self.pages.setdefault(url, {})
+            page["etag"] = etag
+            page["last_modified"] = last_modified
+            page["crawled_at"] = _now()
+
+    def not_modified(self, url):
+        """The server answered 304: the page is unchanged"""
+        with self.lock:
+            self.pages.setdefault(url, {})["crawled_at"] = _now()
+            self.counts["unchanged"] += 1
+
+    def forget(self, url):
+        """Drop a page's validators and hash, so the next run fetches and re-emits it in full"""
+        with self.lock:
+            page = self.pages.setdefault(url, {})
+            for key in ("etag", "last_modified", "content_hash"):
+                page.pop(key, None)
+            self.pending.pop(url, None)
+            self.in_output.discard(url)
+
+    def failed(self, url):
+        """The page could not be scraped: keep whatever the output holds and fetch it in full next run"""
+        self.forget(url)
+        with self.lock:
+            self.counts["failed"] += 1
+
+    def changed(self, url, content):
+        """True when the extracted content differs from the copy in the output"""
+        digest = content_hash(content)
+        with self.lock:
+            self.pages.setdefault(url, {})["crawled_at"] = _now()
+            if url in self.in_output and self.pages[url].get("content_hash") == digest:
+                self.counts["unchanged"] += 1
+                return False
+            self.counts["changed"] += 1
+            return True
+
+    def record(self, url, content):
+        """Note the content written for a page; its hash is committed by `save`"""
+        with self.lock:
+            self.pending[url] = content_hash(content)
+            self.in_output.add(url)
+
+    def seed(self, url, content):
+        """Hash of the content the output actually holds for a page (an empty copy is forgotten)"""
+        if not content:
+            self.forget(url)
+            return
+        with self.lock:
+            self.pages.setdefault(url, {})["content_hash"] = content_hash(content)
+            self.in_output.add(url)
+
+    def resolve(self, url, content, previous_rows, refetch=None):
+        """Decide what a CSV scraper writes for a page, given the content it scraped
+        (None when the server answered 304) and the previous run's rows by URL.
+
+        Returns (previous_row, None) when the previous row is kept: the page is
+        unchanged, or this fetch failed. Otherwise returns (None, content) and
+        records the content, to be written as a new row. A 304 for a page with
+        no previous row is fetched again in full with `refetch`.
+        """
+        previous = previous_rows.get(url)
+        if content is None:
+            if previous is not None:
+                return previous, None
+            print(f"No previous row for {url}, fetching it again in full")
+            self.forget(url)
+            content = (refetch() if refetch else None) or ""
+        if not content:
+            self.failed(url)
+            if previous is not None:
+                print(f"Could not scrape {url}, keeping its previous row")
+                return previous, None
+            return None, content
+        if not self.changed(url, content) and previous is not None:
+            return previous, None
+        self.record(url, content)
+        return None, content
+
+    def save(self):
+        """Commit the hashes of the content written this run and write the file atomically"""
+        with self.lock:
+            now = _now()
+            for url, digest in self.pending.items():
+                page = self.pages.setdefault(url, {})
+                if page.get("content_hash") != digest:
+                    page["content_hash"] = digest
+                    page["changed_at"] = now
+            self.pending = {}
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.pages, file, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+        print(f"Re-crawl: {self.counts['changed']} pages changed, {self.counts['unchanged']} unchanged, "
+              f"{self.counts['failed']} failed (crawl state saved to {self.path})")
+
+def previous_csv_rows(csv_filename, state=None):
+    """Rows of a scraper's previous CSV output by URL, seeding `state` with their content"""
+    rows = {}
+    if not os.path.exists(csv_filename):
+        return rows
+    try:
+        with open(csv_filename, 'r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                row['token_count'] = int(row['token_count'] or 0)
+                row['char_count'] = int(row['char_count'] or 0)
+                rows[row['url']] = row
+                if state is not None:
+                    # The content column is wrapped in triple quotes
+                    state.seed(row['url'], row['content'][3:-3] if row['content'].startswith('"""') else row['content'])
+        print(f"Loaded {len(rows)} rows from the previous {csv_filename}")
+    except Exception as e:
+        print(f"Error reading previous {csv_filename}: {str(e)}")
+    return rows
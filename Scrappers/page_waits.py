@@ -0,0 +1,195 @@
+import time
+import weakref
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Shared page readiness waits for the scrapers: instead of sleeping a fixed
+# 2-5 seconds after every navigation or click, wait for the signal that the
+# page is actually ready and move on as soon as it is.
+
+POLL_INTERVAL = 0.1
+
+CONDITIONS = {
+    "present": EC.presence_of_element_located,
+    "visible": EC.visibility_of_element_located,
+    "clickable": EC.element_to_be_clickable,
+}
+
+# Installs a MutationObserver on the current document (once per page load) and
+# returns the milliseconds since the DOM last changed. Only added/removed nodes
+# and text count: attribute churn (animations, hover classes) never stops on
+# some pages and would keep the DOM from ever looking quiet
+DOM_QUIET_SCRIPT = """
+if (!window.__doc0Waits) {
+    window.__doc0Waits = {lastMutation: performance.now()};
+    new MutationObserver(() => { window.__doc0Waits.lastMutation = performance.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    if (performance.setResourceTimingBufferSize) performance.setResourceTimingBufferSize(100000);
+}
+return performance.now() - window.__doc0Waits.lastMutation;
+"""
+
+# Resource timing entries are added when a request finishes, so the time since
+# the last one ended says how long the network has been quiet
+NETWORK_QUIET_SCRIPT = """
+let last = 0;
+for (const entry of performance.getEntriesByType('resource')) {
+    last = Math.max(last, entry.responseEnd || entry.startTime);
+}
+return [document.readyState, performance.now() - last];
+"""
+
+class AdaptiveTimeout:
+    """A timeout that follows how long the site actually takes.
+
+    Until `warmup` waits have been seen the maximum is used; after that the
+    timeout is `factor` times the 90th percentile of recent waits, kept
+    between `minimum` and `maximum`. A wait that times out counts as the full
+    timeout, so a slowing site gets longer timeouts again.
+    """
+
+    def __init__(self, minimum=2.0, maximum=15.0, factor=4.0, window=50, warmup=5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.window = window
+        self.warmup = warmup
+        self.samples = []
+
+    def current(self):
+        if len(self.samples) < self.warmup:
+            return self.maximum
+        ordered = sorted(self.samples)
+        p90 = ordered[int(0.9 * (len(ordered) - 1))]
+        return min(self.maximum, max(self.minimum, self.factor * p90))
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        if len(self.samples) > self.window:
+            self.samples.pop(0)
+
+class PageWaiter:
+    """Readiness waits for one WebDriver, with adaptive timeouts and per-page timings.
+
+    Every wait returns as soon as its signal is seen; a wait that times out
+    logs it and returns None/False so the scraper carries on with whatever
+    loaded, as it did after a fixed sleep. `load` navigates and records how
+    long the page took in `pages`; `summary` prints the totals.
+    """
+
+    def __init__(self, driver, quiet_ms=300, idle_ms=500, min_timeout=2.0, max_timeout=15.0, settle_timeout=3.0):
+        self.driver = driver
+        self.quiet_ms = quiet_ms
+        self.idle_ms = idle_ms
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        # A page that never goes quiet is scraped as it is, so the quiet-DOM wait gets a short budget
+        self.settle_timeout = settle_timeout
+        self.timeouts = {}
+        self.pages = []
+        self.current = None
+
+    def _until(self, kind, condition, maximum=None):
+        maximum = maximum or self.max_timeout
+        timeout = self.timeouts.setdefault(kind, AdaptiveTimeout(min(self.min_timeout, maximum), maximum))
+        limit = timeout.current()
+        started = time.perf_counter()
+        try:
+            result = WebDriverWait(self.driver, limit, poll_frequency=POLL_INTERVAL).until(condition)
+        except TimeoutException:
+            result = None
+            print(f"Timed out after {limit:.1f}s waiting for {kind}")
+        elapsed = time.perf_counter() - started
+        timeout.record(elapsed if result is not None else limit)
+        if self.current is not None:
+            self.current[kind] = self.current.get(kind, 0.0) + elapsed
+        return result
+
+    def element(self, selector, by=By.CSS_SELECTOR, condition="present"):
+        """Wait for an element matching the selector; returns it, or None on timeout"""
+        return self._until(f"element {selector}", CONDITIONS[condition]((by, selector)))
+
+    def any_element(self, selectors, by=By.CSS_SELECTOR):
+        """Wait for the first of several selectors to match; returns (selector, element) or (None, None)"""
+        def first_match(driver):
+            for selector in selectors:
+                found = driver.find_elements(by, selector)
+                if found:
+                    return selector, found[0]
+            return False
+        return self._until("content element", first_match) or (None, None)
+
+    def predicate(self, script, *args, kind="predicate"):
+        """Wait until a JavaScript expression returns something truthy"""
+        return self._until(kind, lambda driver: driver.execute_script(script, *args))
+
+    def dom_stable(self, quiet_ms=None):
+        """Wait until the DOM has had no mutations for `quiet_ms`"""
+        quiet_ms = quiet_ms or self.quiet_ms
+
+        def quiet(driver):
+            try:
+                return driver.execute_script(DOM_QUIET_SCRIPT) >= quiet_ms
+            except WebDriverException:
+                return False
+        return bool(self._until("DOM quiet", quiet, self.settle_timeout))
+
+    def network_idle(self, idle_ms=None):
+        """Wait until the document has loaded and no request has finished for `idle_ms`"""
+        idle_ms = idle_ms or self.idle_ms
+
+        def idle(driver):
+            state, since_last = driver.execute_script(NETWORK_QUIET_SCRIPT)
+            return state == "complete" and since_last >= idle_ms
+        return bool(self._until("network idle", idle))
+
+    def settle(self):
+        """After a click or scroll: wait for the DOM to stop changing"""
+        return self.dom_stable()
+
+    def load(self, url, selector=None, by=By.CSS_SELECTOR, condition="present", network=False):
+        """Navigate to url and wait until it is ready: the selector (or the first of a
+        list of selectors) matches, the network is idle (when `network`) and the DOM is
+        quiet. Returns the matched element, or None.
+        """
+        self.current = {"url": url}
+        started = time.perf_counter()
+        try:
+            self.driver.get(url)
+            self.current["navigate"] = time.perf_counter() - started
+            if isinstance(selector, (list, tuple)):
+                element = self.any_element(selector, by)[1]
+            else:
+                element = self.element(selector, by, condition) if selector else None
+            if network:
+                self.network_idle()
+            self.dom_stable()
+        finally:
+            self.current["total"] = time.perf_counter() - started
+            self.pages.append(self.current)
+            steps = ", ".join(f"{k} {v:.2f}s" for k, v in self.current.items() if k not in ("url", "total"))
+            print(f"Page ready in {self.current['total']:.2f}s ({steps})")
+            self.current = None
+        return element
+
+    def summary(self):
+        """Print how long pages took to become ready"""
+        if not self.pages:
+            return
+        totals = sorted(page["total"] for page in self.pages)
+        print(f"\nPage readiness over {len(totals)} pages: total {sum(totals):.1f}s, "
+              f"mean {sum(totals) / len(totals):.2f}s, p50 {totals[len(totals) // 2]:.2f}s, "
+              f"p95 {totals[int(0.95 * (len(totals) - 1))]:.2f}s, max {totals[-1]:.2f}s")
+        for page in sorted(self.pages, key=lambda page: page["total"], reverse=True)[:5]:
+            print(f"  {page['total']:.2f}s {page['url']}")
+
+_waiters = weakref.WeakKeyDictionary()
+
+def waiter_for(driver):
+    """The PageWaiter of a driver, so its timeouts and timings persist across calls"""
+    waiter = _waiters.get(driver)
+    if waiter is None:
+        waiter = _waiters[driver] = PageWaiter(driver)
+    return waiter
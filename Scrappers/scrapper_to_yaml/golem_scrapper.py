@@ -1,12 +1,31 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 import time
 import yaml
 import os
+import sys
+import queue
+import argparse
+import tempfile
+import threading
+import http.server
+import functools
+from urllib.parse import urlparse, urljoin
 from datetime import datetime
+from record_writer import RecordWriter, journal_path_for
+
+# The readiness waits shared by all scrapers live one level up, in Scrappers/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from page_waits import waiter_for
+from static_fetch import StaticFetcher, NOT_MODIFIED
+from crawl_state import CrawlState, state_path_for
+
+# Use the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 def count_characters(text):
     """Count characters in text"""
@@ -32,18 +51,24 @@ def setup_driver(headless=True):
  
     return webdriver.Chrome(options=options)
 
-def get_page_content(driver, url):
+def get_page_content(driver, url, fetcher=None):
     try:
         print(f"Navigating to URL: {url}")
-        driver.get(url)
         
-        # Wait for content to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
-        )
+        # With a fetcher, server-rendered pages are read straight from the HTML
+        main_content = None
+        if fetcher is not None:
+            document, main_content = fetcher.content(url, "main")
+            if document is NOT_MODIFIED:
+                return None
+        
+        # Otherwise wait for the content to load and stop changing
+        if main_content is None:
+            main_content = waiter_for(driver).load(url, "main")
+        if main_content is None:
+            raise TimeoutException("main content did not load")
         
         print("Extracting main content from the page.")
-        main_content = driver.find_element(By.CSS_SELECTOR, "main")
         content_text = main_content.text
         
         print(f"Content extracted from {url}: {content_text[:100]}...")  # Print first 100 characters for debugging
@@ -52,68 +77,26 @@ def get_page_content(driver, url):
         print(f"Error on page {url}: {str(e)}")
         return ""
 
-def save_to_yaml(data_item, filename="golem_docs.yaml"):
-    """Save the data to a YAML file in the specified format with proper pipe character for content"""
-    try:
-        # Load existing data if file exists, otherwise create new structure
-        yaml_dict = {"golem": []}
-        
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as file:
-                    file_content = file.read().strip()
-                    if file_content and file_content != "golem:":
-                        yaml_dict = yaml.safe_load(file_content)
-                    # If file just contains "golem:" with no entries, we'll use our empty list
-            except Exception as e:
-                print(f"Error reading existing YAML file: {str(e)}, creating new file")
-        
-        # Determine the next ID
-        next_id = 1
-        if yaml_dict and "golem" in yaml_dict and yaml_dict["golem"]:
-            # Get the highest ID and increment by 1
-            existing_ids = [item.get("id_parent", 0) for item in yaml_dict["golem"]]
-            if existing_ids:
-                next_id = max(existing_ids) + 1
-        
-        # Add ID to the data item
-        data_item["id_parent"] = next_id
-        
-        # Add the new item to the list
-        if "golem" not in yaml_dict:
-            yaml_dict["golem"] = []
-        yaml_dict["golem"].append(data_item)
-        
-        # Create a properly formatted YAML file manually
-        with open(filename, 'w', encoding='utf-8') as file:
-            file.write("golem:\n")
-            
-            for entry in yaml_dict["golem"]:
-                file.write(f"- id_parent: {entry['id_parent']}\n")
-                file.write(f"  title: {entry['title']}\n")
-                file.write(f"  url: {entry['url']}\n")
-                file.write("  content: |\n")
-                
-                # Make sure content is a string and split by lines
-                content_str = str(entry['content'])
-                for line in content_str.split('\n'):
-                    # Ensure each line has proper indentation
-                    file.write(f"    {line}\n")
-                
-                file.write(f"  section: {entry['section']}\n")
-                file.write(f"  char_count: {entry['char_count']}\n")
-                file.write(f"  approx_token_count: {entry['approx_token_count']}\n")
-        
-        print(f"Data saved to {filename} with ID {next_id}")
-        return next_id
-    except Exception as e:
-        print(f"Error saving to YAML: {str(e)}")
-        return None
+def seed_crawl_state(state, writer):
+    """Hash the pages already in the journal, so the first re-crawl only re-emits changed ones"""
+    latest = {record["url"]: record["content"] for record in writer.records() if record.get("url")}
+    for url, content in latest.items():
+        state.seed(url, content)
 
-def get_section_path_from_url(url):
+def build_page_record(url, content, section_path):
+    """The YAML record for a scraped page (id_parent is assigned when it is saved)"""
+    return {
+        "title": section_path[-1] if section_path else "Unknown",
+        "url": url,
+        "content": content,
+        "section": section_path[0] if section_path else "Unknown",
+        "char_count": count_characters(content),
+        "approx_token_count": estimate_tokens(content)
+    }
+
+def get_section_path_from_url(url, base="https://learn.golem.cloud/"):
     """Extract section path from URL to build proper breadcrumbs"""
     # Remove domain part and trailing slash
-    base = "https://learn.golem.cloud/"
     path = url.replace(base, "").strip("/")
     
     # If empty, it's the homepage
@@ -130,9 +113,9 @@ def expand_all_sidebar_sections(driver):
         print("Attempting to expand all nextra sidebar sections...")
         
         # Wait for sidebar to load using the new class structure
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "aside.nextra-sidebar-container"))
-        )
+        waiter = waiter_for(driver)
+        if waiter.element("aside.nextra-sidebar-container") is None:
+            raise TimeoutException("sidebar did not load")
         
         # This script will find and click all expandable items in the Nextra sidebar
         expand_script = """
@@ -215,10 +198,12 @@ def expand_all_sidebar_sections(driver):
                     # Try to click it
                     driver.execute_script("arguments[0].click();", parent)
                     clicked += 1
-                    time.sleep(0.3)  # Short delay after each click
                 except Exception as e:
                     continue
             
+            # Let the clicked sections finish expanding
+            if clicked:
+                waiter.settle()
             print(f"Clicked additional {clicked} expandable items directly")
         except Exception as e:
             print(f"Error in fallback expansion: {str(e)}")
@@ -245,7 +230,7 @@ def expand_all_sidebar_sections(driver):
             final_expanded = driver.execute_script(expand_hidden_script)
             if final_expanded > 0:
                 print(f"Expanded {final_expanded} additional hidden sections")
-                time.sleep(1)  # Wait for expansion
+                waiter.settle()  # Wait for expansion
         except Exception as e:
             print(f"Error in final expansion pass: {str(e)}")
         
@@ -270,6 +255,10 @@ def scroll_sidebar(driver):
         # Execute JavaScript to scroll the sidebar
         scroll_script = """
         function smoothScroll(element) {
+            // Set once the scroll back to the top has happened
+            window.__doc0ScrollDone = false;
+            const finish = () => { element.scrollTo(0, 0); window.__doc0ScrollDone = true; };
+            
             // Start at the top
             element.scrollTo(0, 0);
             
@@ -280,7 +269,7 @@ def scroll_sidebar(driver):
             // If not much to scroll, just do a simple scroll
             if (totalHeight <= clientHeight * 2) {
                 element.scrollTo(0, totalHeight);
-                setTimeout(() => element.scrollTo(0, 0), 300);
+                setTimeout(finish, 300);
                 return;
             }
             
@@ -295,7 +284,7 @@ def scroll_sidebar(driver):
                     setTimeout(scrollStep, 100);
                 } else {
                     // Reached bottom, wait a bit then scroll back to top
-                    setTimeout(() => element.scrollTo(0, 0), 300);
+                    setTimeout(finish, 300);
                 }
             }
             
@@ -309,7 +298,11 @@ def scroll_sidebar(driver):
         
         height = driver.execute_script(scroll_script, sidebar)
         print(f"Scrolled sidebar with total height of {height}px")
-        time.sleep(1)  # Wait for any lazy-loaded content
+        
+        # Wait for the scroll to finish and any lazy-loaded content
+        waiter = waiter_for(driver)
+        waiter.predicate("return window.__doc0ScrollDone === true;", kind="sidebar scroll")
+        waiter.settle()
         
         return True
     except Exception as e:
@@ -322,9 +315,9 @@ def collect_all_sidebar_links(driver):
     
     try:
         # Wait for sidebar to load with new class structure
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "aside.nextra-sidebar-container"))
-        )
+        waiter = waiter_for(driver)
+        if waiter.element("aside.nextra-sidebar-container") is None:
+            raise TimeoutException("sidebar did not load")
         
         print("Starting to collect links from Nextra sidebar")
         
@@ -335,7 +328,7 @@ def collect_all_sidebar_links(driver):
         expand_all_sidebar_sections(driver)
         
         # Wait for animations to complete
-        time.sleep(2)
+        waiter.settle()
         
         # Scroll again after expansion
         scroll_sidebar(driver)
@@ -452,26 +445,21 @@ def collect_all_sidebar_links(driver):
         print(f"Error collecting sidebar links: {str(e)}")
         return []
 
-def scrape_golem_docs(driver, base_url, start_url=None):
-    """Scrape the Golem Cloud documentation by following sidebar links"""
-    processed_urls = set()  # Track processed URLs to avoid loops
-    yaml_filename = "golem_docs.yaml"
+def scrape_golem_docs(driver, base_url, start_url=None, yaml_filename="golem_docs.yaml", fsync="batch", compact=True,
+                      fetcher=None, state=None, recrawl=False):
+    """Scrape the Golem Cloud documentation by following sidebar links.
+
+    Pages are appended to the journal next to `yaml_filename`, which is
+    compacted into the YAML file when the crawl ends (unless `compact` is off).
+    With a StaticFetcher, pages are read from their HTML when it holds the content.
+    With a CrawlState, only pages whose content changed are saved; `recrawl`
+    revisits pages already saved instead of skipping them.
+    """
+    writer = RecordWriter(journal_path_for(yaml_filename), fsync=fsync, seed_yaml=yaml_filename)
+    processed_urls = set() if recrawl else set(writer.urls)  # Track processed URLs to avoid loops
     total_saved = 0
-    
-    # Load already processed URLs from YAML file if it exists
-    if os.path.exists(yaml_filename):
-        try:
-            with open(yaml_filename, 'r', encoding='utf-8') as file:
-                file_content = file.read()
-                yaml_data = yaml.safe_load(file_content)
-                if yaml_data and "golem" in yaml_data:
-                    for entry in yaml_data["golem"]:
-                        url = entry.get("url", "")
-                        if url:
-                            processed_urls.add(url)
-            print(f"Loaded {len(processed_urls)} already processed URLs from YAML file")
-        except Exception as e:
-            print(f"Error reading YAML file: {str(e)}")
+    if state is not None:
+        seed_crawl_state(state, writer)
     
     # Remove the starting URL from processed_urls to force reprocessing it if needed
     if start_url and start_url in processed_urls:
@@ -487,33 +475,32 @@ def scrape_golem_docs(driver, base_url, start_url=None):
             return
         
         processed_urls.add(url)
-        content = get_page_content(driver, url)
+        content = get_page_content(driver, url, fetcher)
         
-        # Skip pages with no content
+        # Skip pages the server reports as not modified
+        if content is None:
+            return
+        
+        # Skip pages with no content, fetching them in full next time
         if not content:
             print(f"No content found at {url}, skipping")
+            if state is not None:
+                state.failed(url)
+            return
+        
+        # Skip pages whose content is the same as last crawl
+        if state is not None and not state.changed(url, content):
+            print(f"Content unchanged since the last crawl: {url}")
             return
             
-        char_count = count_characters(content)
-        approx_token_count = estimate_tokens(content)
-        
-        # Determine section from URL path
-        section = section_path[0] if section_path else "Unknown"
-        
-        # Create data dictionary for YAML
-        data = {
-            "title": section_path[-1] if section_path else "Unknown",
-            "url": url,
-            "content": content,
-            "section": section,
-            "char_count": char_count,
-            "approx_token_count": approx_token_count
-        }
+        # Create data dictionary for YAML, with the section taken from the URL path
+        data = build_page_record(url, content, section_path)
         
-        # Save to YAML file
-        saved_id = save_to_yaml(data, yaml_filename)
-        if saved_id:
-            total_saved += 1
+        # Append to the journal
+        saved_id = writer.append(data)
+        total_saved += 1
+        if state is not None:
+            state.record(url, content)
         
         # Print the scraped information
         print("\n--- Scraped Page Information ---")
@@ -523,21 +510,19 @@ def scrape_golem_docs(driver, base_url, start_url=None):
         print(f"Character Count: {data['char_count']}")
         print(f"Approximate Token Count: {data['approx_token_count']}")
         print(f"Content Preview: {content[:150]}...")
-        print(f"Saved to: {yaml_filename} with ID: {saved_id}")
+        print(f"Saved to: {writer.path} with ID: {saved_id}")
         print("-------------------------------\n")
     
     def process_sidebar_links():
         """Process all links in the sidebar navigation"""
         # Navigate to the base URL
-        driver.get(base_url)
-        time.sleep(3)
+        waiter = waiter_for(driver)
+        waiter.load(base_url, "aside.nextra-sidebar-container")
         
-        # If we have a starting URL, navigate there first
+        # If we have a starting URL, scrape from there first
         current_url = base_url
         if start_url:
             current_url = start_url
-            driver.get(current_url)
-            time.sleep(2)
         
         # First, scrape the current page
         section_path = get_section_path_from_url(current_url)
@@ -548,8 +533,7 @@ def scrape_golem_docs(driver, base_url, start_url=None):
         all_sidebar_links = []
         for attempt in range(3):  # Increased to 3 attempts
             print(f"\nAttempt #{attempt+1} to collect all sidebar links")
-            driver.get(base_url)  # Always start from the base URL
-            time.sleep(3)
+            waiter.load(base_url, "aside.nextra-sidebar-container")  # Always start from the base URL
             
             links = collect_all_sidebar_links(driver)
             
@@ -564,9 +548,6 @@ def scrape_golem_docs(driver, base_url, start_url=None):
             # If we didn't add any new links on the third attempt, we can stop
             if new_count == 0 and attempt > 0:
                 break
-                
-            # Wait between attempts
-            time.sleep(2)
         
         print(f"\nTotal unique links to process: {len(all_sidebar_links)}")
         
@@ -582,22 +563,17 @@ def scrape_golem_docs(driver, base_url, start_url=None):
             try:
                 print(f"\nProcessing link [{i+1}/{len(all_sidebar_links)}]: {title} -> {url}")
                 
-                # Navigate to the URL
-                driver.get(url)
-                time.sleep(2)
-                
                 # Get the section path
                 section_path = get_section_path_from_url(url)
                 
-                # Scrape the page content
+                # Navigate to the URL and scrape the page content
                 scrape_page(url, section_path)
                 
                 # Every 5 links, try collecting sidebar links again
                 # This helps ensure we don't miss any links that might appear later
                 if (i+1) % 5 == 0 and i > 0:
                     print(f"Processed {i+1} links. Collecting sidebar links again...")
-                    driver.get(base_url)
-                    time.sleep(2)
+                    waiter.load(base_url, "aside.nextra-sidebar-container")
                     
                     new_links = collect_all_sidebar_links(driver)
                     new_count = 0
@@ -619,12 +595,309 @@ def scrape_golem_docs(driver, base_url, start_url=None):
         print("\n===== Completed sidebar navigation =====\n")
     except Exception as e:
         print(f"Error in main processing: {str(e)}")
+    finally:
+        writer.close()
     
-    return total_saved, yaml_filename
+    output = writer.path
+    if compact:
+        writer.compact(yaml_filename)
+        output = yaml_filename
+    if state is not None:
+        state.save()
+    return total_saved, output
 
-def scrape_from_section(headless=True, start_url=None):
+class HostLimiter:
+    """Per-host politeness: at most `max_concurrent` requests in flight to a host
+    and at least `min_interval` seconds between the starts of two requests to it.
+    """
+
+    def __init__(self, max_concurrent=2, min_interval=0.5):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.next_start = {}
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            slot = self.slots.setdefault(host, threading.BoundedSemaphore(self.max_concurrent))
+        slot.acquire()
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+        return host
+
+    def release(self, host):
+        self.slots[host].release()
+
+class CrawlQueue:
+    """Shared URL queue that hands every URL out once"""
+
+    def __init__(self, skip_urls=()):
+        self.urls = queue.Queue()
+        self.lock = threading.Lock()
+        self.seen = set(skip_urls)
+
+    def add(self, url):
+        with self.lock:
+            if url in self.seen:
+                return False
+            self.seen.add(url)
+        self.urls.put(url)
+        return True
+
+def discover_links(driver, base_url):
+    """Same-site documentation links in the sidebar of the loaded page (or of a StaticDocument)"""
+    links = []
+    try:
+        for anchor in driver.find_elements(By.CSS_SELECTOR, "aside.nextra-sidebar-container a[href]"):
+            href = urljoin(base_url, anchor.get_attribute("href") or "")
+            if href.startswith(base_url) and "#" not in href and not href.endswith((".pdf", ".zip")):
+                links.append(href)
+    except Exception as e:
+        print(f"Error discovering links: {str(e)}")
+    return links
+
+def crawl_worker(worker_id, crawl_queue, results, limiter, base_url, headless, make_driver, fetcher=None):
+    """One worker: take URLs off the queue, scrape them and hand the pages to the writer.
+
+    With a fetcher, pages are read from their HTML and the worker only starts
+    its browser for the first page whose HTML lacks the content.
+    """
+    driver = None
+    try:
+        while True:
+            url = crawl_queue.urls.get()
+            if url is None:
+                crawl_queue.urls.task_done()
+                break
+            try:
+                host = limiter.acquire(url)
+                try:
+                    document, main_content = fetcher.content(url, "main") if fetcher else (None, None)
+                    if document is NOT_MODIFIED:
+                        continue
+                    if main_content is not None:
+                        content = main_content.text
+                        links = discover_links(document, base_url)
+                    else:
+                        if driver is None:
+                            driver = make_driver(headless)
+                        content = get_page_content(driver, url)
+                        links = discover_links(driver, base_url)
+                finally:
+                    limiter.release(host)
+                for link in links:
+                    crawl_queue.add(link)
+                results.put((url, content))
+            except Exception as e:
+                print(f"Worker {worker_id} error on {url}: {str(e)}")
+            finally:
+                crawl_queue.urls.task_done()
+    finally:
+        if driver is not None:
+            waiter_for(driver).summary()
+            driver.quit()
+
+def result_writer(results, writer, base_url, saved, state=None):
+    """The only thread that writes the output file, so records never interleave"""
+    while True:
+        item = results.get()
+        if item is None:
+            break
+        url, content = item
+        if not content:
+            print(f"No content found at {url}, skipping")
+            if state is not None:
+                state.failed(url)
+            continue
+        if state is not None and not state.changed(url, content):
+            print(f"Content unchanged since the last crawl: {url}")
+            continue
+        data = build_page_record(url, content, get_section_path_from_url(url, base_url))
+        try:
+            saved_id = writer.append(data)
+        except Exception as e:
+            print(f"Error saving {url}: {str(e)}")
+            continue
+        if state is not None:
+            state.record(url, content)
+        saved.append(url)
+        print(f"Saved {url} with ID {saved_id} ({len(saved)} pages)")
+
+def crawl_parallel(start_url, workers=4, headless=True, yaml_filename="golem_docs.yaml",
+                   max_per_host=2, min_interval=0.5, seed_urls=None, base_url=None, make_driver=setup_driver,
+                   fsync="batch", compact=True, static=True, recrawl=False):
+    """Crawl with `workers` headless browsers fed from a shared URL queue.
+
+    The queue is seeded with the start page (plus the sidebar links when
+    `seed_urls` is not given) and grows with the sidebar links of every
+    scraped page that are under `base_url` (the start URL by default).
+    URLs already saved are skipped; pages go to the journal and are
+    compacted into `yaml_filename` at the end, as in scrape_golem_docs.
+    With `static`, workers read server-rendered pages over HTTP and only
+    start a browser when a page's HTML lacks the content. With `recrawl`,
+    saved pages are revisited with conditional requests and only the ones
+    whose content changed are saved again.
+    """
+    base_url = base_url or start_url
+    writer = RecordWriter(journal_path_for(yaml_filename), fsync=fsync, seed_yaml=yaml_filename)
+    state = CrawlState(state_path_for(yaml_filename))
+    seed_crawl_state(state, writer)
+    processed_urls = set() if recrawl else set(writer.urls)
+
+    crawl_queue = CrawlQueue(processed_urls)
+    crawl_queue.add(start_url)
+    if recrawl:
+        # A page answering 304 has no links to follow, so queue every saved page up front
+        for url in sorted(writer.urls):
+            crawl_queue.add(url)
+    if seed_urls is None:
+        # One browser walks the fully expanded sidebar once to seed the queue
+        driver = make_driver(headless)
+        try:
+            waiter_for(driver).load(start_url, "aside.nextra-sidebar-container")
+            seed_urls = [link["url"] for link in collect_all_sidebar_links(driver)]
+        finally:
+            driver.quit()
+    for url in seed_urls:
+        crawl_queue.add(url)
+
+    results = queue.Queue()
+    saved = []
+    limiter = HostLimiter(max_per_host, min_interval)
+    fetcher = StaticFetcher(pool_size=max(workers, max_per_host), state=state) if static else None
+    started = time.perf_counter()
+
+    writer_thread = threading.Thread(target=result_writer, args=(results, writer, base_url, saved, state))
+    writer_thread.start()
+    threads = [
+        threading.Thread(
+            target=crawl_worker,
+            args=(i, crawl_queue, results, limiter, base_url, headless, make_driver, fetcher),
+            name=f"crawler-{i}"
+        )
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Every URL, including ones discovered while crawling, has been processed
+    crawl_queue.urls.join()
+    for _ in threads:
+        crawl_queue.urls.put(None)
+    for thread in threads:
+        thread.join()
+    results.put(None)
+    writer_thread.join()
+    writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Crawled {len(crawl_queue.seen) - len(processed_urls)} URLs with {workers} workers in {elapsed:.1f}s, "
+          f"saved {len(saved)} pages")
+    if fetcher is not None:
+        fetcher.summary()
+    output = writer.path
+    if compact:
+        writer.compact(yaml_filename)
+        output = yaml_filename
+    state.save()
+    return len(saved), output
+
+FIXTURE_PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title></head>
+<body>
+<aside class="nextra-sidebar-container">{links}</aside>
+<main><h1>{title}</h1><p>Fixture page {index} for crawler tests. {body}</p></main>
+</body></html>
+"""
+
+def write_fixture_site(directory, pages=20):
+    """Static documentation site: every page links to every other page in its sidebar"""
+    names = ["index"] + [f"page-{i}" for i in range(1, pages)]
+    links = "".join(f'<a href="/{name}.html">{name}</a>' for name in names)
+    for index, name in enumerate(names):
+        with open(os.path.join(directory, f"{name}.html"), 'w', encoding='utf-8') as file:
+            file.write(FIXTURE_PAGE.format(title=name, links=links, index=index, body="Lorem ipsum " * 20))
+    return names
+
+def run_fixture_test(workers=4, pages=20, headless=True, make_driver=setup_driver, static=True):
+    """Crawl a local static HTTP server serving fixture pages and check every page was saved once.
+    Then re-crawl it: unchanged, nothing is saved again; with one page failing, its record is kept
+    and its validators dropped; after restoring it and editing another page, only the edited one is saved.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        site = os.path.join(directory, "site")
+        os.makedirs(site)
+        names = write_fixture_site(site, pages)
+        handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=site)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+        yaml_filename = os.path.join(directory, "fixture_docs.yaml")
+
+        def crawl(recrawl=False):
+            saved, _ = crawl_parallel(
+                base_url + "index.html",
+                workers=workers,
+                headless=headless,
+                yaml_filename=yaml_filename,
+                min_interval=0,
+                seed_urls=[],
+                base_url=base_url,
+                make_driver=make_driver,
+                static=static,
+                recrawl=recrawl
+            )
+            return saved
+
+        try:
+            crawl()
+            unchanged_saved = crawl(recrawl=True)
+
+            # A page that fails to load keeps its record and is fetched in full next time
+            failing = os.path.join(site, f"{names[2]}.html")
+            os.rename(failing, failing + ".bak")
+            failed_saved = crawl(recrawl=True)
+            os.rename(failing + ".bak", failing)
+            failed_state = CrawlState(state_path_for(yaml_filename)).pages.get(base_url + f"{names[2]}.html", {})
+
+            # Edit one page, with a modification time the server will report as newer
+            edited = os.path.join(site, f"{names[1]}.html")
+            with open(edited, 'r', encoding='utf-8') as file:
+                html = file.read()
+            with open(edited, 'w', encoding='utf-8') as file:
+                file.write(html.replace("Fixture page", "Edited fixture page"))
+            os.utime(edited, (time.time() + 5, time.time() + 5))
+            edited_saved = crawl(recrawl=True)
+        finally:
+            server.shutdown()
+
+        with open(yaml_filename, 'r', encoding='utf-8') as file:
+            entries = (yaml.load(file, Loader=SafeLoader) or {}).get("golem") or []
+        urls = [entry["url"] for entry in entries]
+        ids = [entry["id_parent"] for entry in entries]
+        assert len(urls) == len(set(urls)) == len(names), f"expected {len(names)} unique pages, got {len(urls)}"
+        assert sorted(ids) == list(range(1, len(names) + 1)), "id_parent values are not sequential"
+        assert unchanged_saved == 0, f"unchanged re-crawl saved {unchanged_saved} pages"
+        assert failed_saved == 0, f"re-crawl with a failing page saved {failed_saved} pages"
+        assert not failed_state.get("last_modified"), "failed page kept its validators"
+        assert edited_saved == 1, f"re-crawl after one edit saved {edited_saved} pages"
+        assert sum("Edited fixture page" in entry["content"] for entry in entries) == 1, "edited page not updated"
+        print(f"Fixture crawl OK: {len(urls)} pages with {workers} workers, re-crawls saved "
+              f"{unchanged_saved} unchanged and {edited_saved} edited pages")
+        return True
+
+def scrape_from_section(headless=True, start_url=None, yaml_filename="golem_docs.yaml", fsync="batch", compact=True,
+                        static=True, recrawl=False):
     """Start scraping from a specific URL or the base URL"""
     driver = setup_driver(headless)
+    state = CrawlState(state_path_for(yaml_filename))
+    fetcher = StaticFetcher(state=state) if static else None
     base_url = "https://learn.golem.cloud/"
     
     try:
@@ -634,7 +907,9 @@ def scrape_from_section(headless=True, start_url=None):
             print("Starting scrape from documentation homepage")
         
         # Use the scraper with optional start URL
-        pages_processed, yaml_file = scrape_golem_docs(driver, base_url, start_url)
+        pages_processed, yaml_file = scrape_golem_docs(
+            driver, base_url, start_url, yaml_filename, fsync, compact, fetcher, state, recrawl
+        )
         
         # Print summary
         print("\n===== Scraping Summary =====")
@@ -643,11 +918,57 @@ def scrape_from_section(headless=True, start_url=None):
         print("Documentation scraping completed!")
         
     finally:
+        if fetcher is not None:
+            fetcher.summary()
+        waiter_for(driver).summary()
         print("Closing the WebDriver.")
-        time.sleep(2)
         driver.quit()
 
 if __name__ == "__main__":
-    # Start scraping from the base URL
-    start_url = "https://learn.golem.cloud/"
-    scrape_from_section(headless=False, start_url=start_url)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape the Golem documentation into golem_docs.yaml")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Browsers crawling in parallel; 1 keeps the original single-browser crawl")
+    parser.add_argument("--max-per-host", type=int, default=2, help="Concurrent page loads per host")
+    parser.add_argument("--min-interval", type=float, default=0.5, help="Seconds between page loads per host")
+    parser.add_argument("--headless", action="store_true", help="Run the browsers without a window")
+    parser.add_argument("--output", default="golem_docs.yaml", help="YAML file the crawl is compacted into")
+    parser.add_argument("--fsync", choices=["always", "batch", "never"], default="batch",
+                        help="When appended pages are synced to disk")
+    parser.add_argument("--no-compact", action="store_true",
+                        help="Leave the pages in the .jsonl journal instead of rewriting the YAML file")
+    parser.add_argument("--browser-only", action="store_true",
+                        help="Load every page in the browser instead of reading server-rendered HTML directly")
+    parser.add_argument("--recrawl", action="store_true",
+                        help="Revisit saved pages with conditional requests and save the ones that changed")
+    parser.add_argument("--test", action="store_true", help="Crawl a local fixture site instead of the docs")
+    parser.add_argument("--test-pages", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.test:
+        run_fixture_test(workers=max(1, args.workers), pages=args.test_pages, headless=True,
+                         static=not args.browser_only)
+    elif args.workers > 1:
+        crawl_parallel(
+            "https://learn.golem.cloud/",
+            workers=args.workers,
+            headless=True,
+            yaml_filename=args.output,
+            max_per_host=args.max_per_host,
+            min_interval=args.min_interval,
+            fsync=args.fsync,
+            compact=not args.no_compact,
+            static=not args.browser_only,
+            recrawl=args.recrawl
+        )
+    else:
+        # Start scraping from the base URL
+        start_url = "https://learn.golem.cloud/"
+        scrape_from_section(
+            headless=args.headless,
+            start_url=start_url,
+            yaml_filename=args.output,
+            fsync=args.fsync,
+            compact=not args.no_compact,
+            static=not args.browser_only,
+            recrawl=args.recrawl
+        )
\ No newline at end of file
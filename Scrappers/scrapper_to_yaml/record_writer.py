@@ -0,0 +1,172 @@
+import os
+import json
+import threading
+import yaml
+
+# Use the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+def journal_path_for(yaml_filename):
+    """The JSONL journal the crawl appends to before it is compacted into `yaml_filename`"""
+    return os.path.splitext(yaml_filename)[0] + ".jsonl"
+
+def write_yaml_entry(file, entry):
+    """Write one record in the docs YAML layout, with the content as a literal block"""
+    file.write(f"- id_parent: {entry['id_parent']}\n")
+    file.write(f"  title: {entry['title']}\n")
+    file.write(f"  url: {entry['url']}\n")
+    file.write("  content: |\n")
+
+    # Make sure content is a string and split by lines
+    content_str = str(entry['content'])
+    for line in content_str.split('\n'):
+        # Ensure each line has proper indentation
+        file.write(f"    {line}\n")
+
+    file.write(f"  section: {entry['section']}\n")
+    file.write(f"  char_count: {entry['char_count']}\n")
+    file.write(f"  approx_token_count: {entry['approx_token_count']}\n")
+
+class RecordWriter:
+    """Append-only writer for scraped pages.
+
+    Every page is one JSON line appended to the journal, so saving a page
+    costs the same no matter how many pages came before it. The next
+    id_parent and the id of every saved URL are kept in memory; they are
+    rebuilt from the journal when it is reopened (or, the first time,
+    imported from an existing YAML file). A page saved again keeps its id and
+    the later record replaces the earlier one when compacting. A line cut
+    short by a crash is truncated away on open. `compact` writes the
+    canonical YAML file from the journal.
+
+    fsync policy: "always" syncs after every record, "batch" every
+    `fsync_every` records and on close, "never" leaves it to the OS.
+    """
+
+    def __init__(self, path, key="golem", fsync="batch", fsync_every=20, seed_yaml=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.path = path
+        self.key = key
+        self.fsync = fsync
+        self.fsync_every = fsync_every
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.urls = set()
+        self.ids = {}
+        self.unsynced = 0
+
+        if os.path.exists(path):
+            self._recover()
+        elif seed_yaml and os.path.exists(seed_yaml):
+            self._import_yaml(seed_yaml)
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _track(self, record):
+        self.next_id = max(self.next_id, int(record.get("id_parent", 0)) + 1)
+        if record.get("url"):
+            self.urls.add(record["url"])
+            self.ids[record["url"]] = record["id_parent"]
+
+    def _recover(self):
+        """Rebuild the in-memory state and drop a trailing partial line"""
+        good_end = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"Skipping unreadable line at byte {good_end} of {self.path}")
+                    good_end += len(line)
+                    continue
+                self._track(record)
+                good_end += len(line)
+        if good_end < os.path.getsize(self.path):
+            print(f"Truncating partial record at the end of {self.path}")
+            with open(self.path, 'r+b') as file:
+                file.truncate(good_end)
+        print(f"Loaded {len(self.urls)} already processed URLs from {self.path}")
+
+    def _import_yaml(self, yaml_filename):
+        """Start the journal from the entries of an existing YAML file"""
+        try:
+            with open(yaml_filename, 'r', encoding='utf-8') as file:
+                yaml_data = yaml.load(file, Loader=SafeLoader) or {}
+        except Exception as e:
+            print(f"Error reading existing YAML file: {str(e)}, starting an empty journal")
+            return
+        entries = yaml_data.get(self.key) or []
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for entry in entries:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._track(entry)
+            file.flush()
+            os.fsync(file.fileno())
+        print(f"Imported {len(entries)} entries from {yaml_filename} into {self.path}")
+
+    def append(self, record):
+        """Assign the record its id_parent (the URL's existing one, or the next), append it and return the id"""
+        with self.lock:
+            record["id_parent"] = self.ids.get(record["url"], self.next_id)
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+            self.next_id = max(self.next_id, record["id_parent"] + 1)
+            self.urls.add(record["url"])
+            self.ids[record["url"]] = record["id_parent"]
+            self.unsynced += 1
+            if self.fsync == "always" or (self.fsync == "batch" and self.unsynced >= self.fsync_every):
+                self._sync()
+            return record["id_parent"]
+
+    def _sync(self):
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            if self.fsync != "never" and self.unsynced:
+                self._sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def records(self):
+        """Every complete record in the journal, in the order it was written"""
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def compact(self, yaml_filename):
+        """Write the journal as the canonical YAML file (the latest record of each id), replacing it atomically"""
+        self.close()
+        latest = {}
+        for entry in self.records():
+            latest[entry["id_parent"]] = entry
+        temp_filename = yaml_filename + ".tmp"
+        count = 0
+        with open(temp_filename, 'w', encoding='utf-8') as file:
+            file.write(f"{self.key}:\n")
+            for id_parent in sorted(latest):
+                write_yaml_entry(file, latest[id_parent])
+                count += 1
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, yaml_filename)
+        print(f"Compacted {count} entries from {self.path} into {yaml_filename}")
+        return count
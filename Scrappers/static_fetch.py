@@ -0,0 +1,314 @@
+import re
+import time
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+# Browserless fast path for the scrapers: most documentation sites render
+# their content on the server, so the page HTML already holds what Chrome
+# would show. Pages are fetched over a pooled HTTP session and parsed with the
+# standard library; the parsed elements answer find_element(s), .text and
+# get_attribute like Selenium's, so the scrapers' extraction code runs on
+# either. A scraper falls back to the browser for a page only when its HTML
+# lacks the content.
+
+# Static content shorter than this is taken to be a client-rendered shell
+MIN_CONTENT_CHARS = 100
+
+# Returned instead of a document when a conditional request got 304 Not Modified
+NOT_MODIFIED = object()
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) doc0-scraper"
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "details", "dd", "div", "dl", "dt", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "summary", "table", "tr", "ul"
+}
+
+_WHITESPACE = re.compile(r"\s+")
+# Spaces, tabs and newlines inside <pre> survive the whitespace clean-up as these
+_PRE_KEEP = str.maketrans({" ": "\x01", "\t": "\x02", "\n": "\x00"})
+_PRE_RESTORE = str.maketrans({"\x01": " ", "\x02": "\t", "\x00": "\n"})
+
+_COMPOUND = re.compile(
+    r"(?P<tag>\*|[a-zA-Z][\w-]*)"
+    r"|#(?P<id>[\w-]+)"
+    r"|\.(?P<cls>[\w-]+)"
+    r"|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~]?=)\s*(?:'(?P<sq>[^']*)'|\"(?P<dq>[^\"]*)\"|(?P<bare>[^\]\s]+)))?\s*\]"
+)
+
+def _parse_compound(text, selector):
+    """One compound selector (tag, #id, .class and [attr] parts) as a list of tests"""
+    tests = []
+    position = 0
+    while position < len(text):
+        match = _COMPOUND.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unsupported CSS selector for static pages: {selector}")
+        if match.group("tag"):
+            if match.group("tag") != "*":
+                tests.append(("tag", match.group("tag").lower()))
+        elif match.group("id"):
+            tests.append(("=", "id", match.group("id")))
+        elif match.group("cls"):
+            tests.append(("~=", "class", match.group("cls")))
+        else:
+            value = next((v for v in (match.group("sq"), match.group("dq"), match.group("bare")) if v is not None), None)
+            tests.append((match.group("op") or "has", match.group("attr").lower(), value))
+        position = match.end()
+    return tests
+
+def parse_selector(selector):
+    """A selector group as a list of chains of (combinator, tests), leftmost first.
+    Supports descendant and child (>) combinators.
+    """
+    chains = []
+    for part in selector.split(","):
+        tokens = part.replace(">", " > ").split()
+        if not tokens:
+            raise ValueError(f"Empty CSS selector: {selector}")
+        chain = []
+        combinator = " "
+        for token in tokens:
+            if token == ">":
+                combinator = ">"
+                continue
+            chain.append((combinator, _parse_compound(token, selector)))
+            combinator = " "
+        chains.append(chain)
+    return chains
+
+def _matches_compound(element, tests):
+    for test in tests:
+        if test[0] == "tag":
+            if element.tag != test[1]:
+                return False
+            continue
+        op, name, value = test
+        actual = element.attrs.get(name)
+        if actual is None:
+            return False
+        if op == "=" and actual != value:
+            return False
+        if op == "~=" and value not in actual.split():
+            return False
+        if op == "*=" and value not in actual:
+            return False
+        if op == "^=" and not actual.startswith(value):
+            return False
+        if op == "$=" and not actual.endswith(value):
+            return False
+    return True
+
+def _matches_chain(element, chain):
+    if not _matches_compound(element, chain[-1][1]):
+        return False
+    node = element
+    for index in range(len(chain) - 2, -1, -1):
+        combinator = chain[index + 1][0]
+        tests = chain[index][1]
+        node = node.parent
+        if combinator == ">":
+            if node is None or not _matches_compound(node, tests):
+                return False
+            continue
+        while node is not None and not _matches_compound(node, tests):
+            node = node.parent
+        if node is None:
+            return False
+    return True
+
+class StaticElement:
+    """An element of a fetched page, answering the WebElement calls the scrapers make"""
+
+    def __init__(self, tag, attrs, parent, document):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.document = document
+        self.children = []
+
+    def iter_elements(self):
+        """Descendant elements in document order"""
+        stack = [child for child in reversed(self.children) if isinstance(child, StaticElement)]
+        while stack:
+            element = stack.pop()
+            yield element
+            stack.extend(child for child in reversed(element.children) if isinstance(child, StaticElement))
+
+    def select(self, selector):
+        chains = parse_selector(selector)
+        return [element for element in self.iter_elements() if any(_matches_chain(element, chain) for chain in chains)]
+
+    def find_elements(self, by, value):
+        if by == By.TAG_NAME:
+            value = value.lower()
+        elif by == By.CLASS_NAME:
+            value = "." + value
+        elif by != By.CSS_SELECTOR:
+            raise ValueError(f"Unsupported locator for static pages: {by}")
+        return self.select(value)
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"No element matches {value}")
+        return found[0]
+
+    def get_attribute(self, name):
+        value = self.attrs.get(name)
+        if value is not None and name in ("href", "src"):
+            # Selenium returns the resolved URL for these
+            return urljoin(self.document.url, value)
+        return value
+
+    @property
+    def text(self):
+        """Readable text: block elements on their own lines, whitespace collapsed outside <pre>"""
+        parts = []
+        _collect_text(self, parts, False)
+        lines = (re.sub(" {2,}", " ", line).strip() for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line).translate(_PRE_RESTORE)
+
+def _collect_text(element, parts, in_pre):
+    for child in element.children:
+        if isinstance(child, str):
+            parts.append(child.translate(_PRE_KEEP) if in_pre else _WHITESPACE.sub(" ", child))
+            continue
+        if child.tag in SKIP_TAGS:
+            continue
+        if child.tag == "br":
+            parts.append("\x00" if in_pre else "\n")
+            continue
+        block = child.tag in BLOCK_TAGS
+        if block:
+            parts.append("\n")
+        elif child.tag in ("td", "th"):
+            parts.append(" ")
+        _collect_text(child, parts, in_pre or child.tag == "pre")
+        if block:
+            parts.append("\n")
+
+class StaticDocument(StaticElement):
+    """A parsed page; `content` finds the scraper's content element in it"""
+
+    def __init__(self, url, html):
+        super().__init__("#document", {}, None, self)
+        self.url = url
+        _TreeBuilder(self).build(html)
+
+    def content(self, selectors, min_chars=MIN_CONTENT_CHARS):
+        """The first content element with real text, or None when the HTML lacks it"""
+        for selector in [selectors] if isinstance(selectors, str) else selectors:
+            for element in self.select(selector):
+                if len(element.text) >= min_chars:
+                    return element
+        return None
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self, document):
+        super().__init__(convert_charrefs=True)
+        self.document = document
+        self.stack = [document]
+
+    def build(self, html):
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        parent = self.stack[-1]
+        element = StaticElement(tag, {name: value or "" for name, value in attrs}, parent, self.document)
+        parent.children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        parent = self.stack[-1]
+        parent.children.append(StaticElement(tag, {name: value or "" for name, value in attrs}, parent, self.document))
+
+    def handle_endtag(self, tag):
+        # Close the nearest open element with this tag and anything left open inside it
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+class StaticFetcher:
+    """Pooled HTTP fetches of documentation pages, with counts of pages served
+    statically and pages that needed the browser.
+
+    With a CrawlState, requests are conditional on the validators stored for
+    the URL and a 304 answer yields NOT_MODIFIED instead of a document.
+    """
+
+    def __init__(self, pool_size=8, timeout=15, min_chars=MIN_CONTENT_CHARS, state=None):
+        self.timeout = timeout
+        self.min_chars = min_chars
+        self.state = state
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"})
+        self.lock = threading.Lock()
+        self.stats = {"static": 0, "browser": 0, "not_modified": 0, "seconds": 0.0}
+
+    def fetch(self, url):
+        """The parsed page, NOT_MODIFIED, or None when it could not be fetched as HTML"""
+        started = time.perf_counter()
+        try:
+            headers = self.state.conditional_headers(url) if self.state is not None else {}
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+            if response.status_code == 304 and headers:
+                self.state.not_modified(url)
+                return NOT_MODIFIED
+            if response.status_code != 200 or "html" not in response.headers.get("Content-Type", ""):
+                print(f"Static fetch of {url} returned {response.status_code}")
+                return None
+            if "charset" not in response.headers.get("Content-Type", ""):
+                response.encoding = "utf-8"
+            if self.state is not None:
+                self.state.record_response(url, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return StaticDocument(response.url, response.text)
+        except Exception as e:
+            print(f"Static fetch of {url} failed: {str(e)}")
+            return None
+        finally:
+            with self.lock:
+                self.stats["seconds"] += time.perf_counter() - started
+
+    def content(self, url, selectors):
+        """(document, content element) when the page's HTML has the content, else (document or None, None).
+        The document is NOT_MODIFIED when the page has not changed since the last crawl.
+        """
+        document = self.fetch(url)
+        if document is NOT_MODIFIED:
+            with self.lock:
+                self.stats["not_modified"] += 1
+            print(f"Not modified since the last crawl: {url}")
+            return document, None
+        element = document.content(selectors, self.min_chars) if document is not None else None
+        with self.lock:
+            self.stats["static" if element is not None else "browser"] += 1
+        if element is None:
+            print(f"No static content at {url}, using the browser")
+        return document, element
+
+    def summary(self):
+        total = self.stats["static"] + self.stats["browser"] + self.stats["not_modified"]
+        if total:
+            print(f"\nStatic fetch: {self.stats['static']}/{total} pages without the browser, "
+                  f"{self.stats['browser']} browser fallbacks, {self.stats['not_modified']} not modified, "
+                  f"{self.stats['seconds']:.1f}s fetching")
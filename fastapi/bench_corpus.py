@@ -0,0 +1,46 @@
+"""Micro-benchmark for the corpus load paths.
+
+    python bench_corpus.py [golem_docs.yaml] [--repeat 5]
+"""
+import time
+import argparse
+import yaml
+from corpus import load_yaml, load_corpus, write_snapshot, SafeLoader
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare YAML corpus load paths")
+    parser.add_argument("yaml_path", nargs="?", default="golem_docs.yaml")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    def pure_python():
+        with open(args.yaml_path, 'r', encoding='utf-8') as file:
+            return yaml.load(file, Loader=yaml.SafeLoader)
+
+    paths = [("yaml.SafeLoader (pure Python)", pure_python)]
+    if SafeLoader is not yaml.SafeLoader:
+        paths.append(("yaml.CSafeLoader (libyaml)", lambda: load_yaml(args.yaml_path)))
+    else:
+        print("libyaml is not available, skipping CSafeLoader")
+
+    # Make sure the snapshot exists before timing the warm path
+    write_snapshot(args.yaml_path, load_yaml(args.yaml_path))
+    paths.append(("JSONL snapshot", lambda: load_corpus(args.yaml_path)))
+
+    baseline = None
+    for label, func in paths:
+        seconds, data = best_of(func, args.repeat)
+        docs = sum(len(v or []) for v in data.values())
+        baseline = baseline or seconds
+        print(f"{label:<32} {seconds * 1000:8.1f} ms  {docs} docs  {baseline / seconds:5.1f}x")
+
+if __name__ == "__main__":
+    main()
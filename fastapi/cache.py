@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+# Optional SQLite file shared by every worker on the host
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+# Rows kept in the shared file, and how many writes pass between purges of it
+EMBEDDING_CACHE_SHARED_SIZE = int(os.getenv("EMBEDDING_CACHE_SHARED_SIZE", "100000"))
+EMBEDDING_CACHE_PURGE_EVERY = int(os.getenv("EMBEDDING_CACHE_PURGE_EVERY", "100"))
+
+# Cosine similarity a new query needs to reuse a cached summary
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+
+def normalize_query(text):
+    """Lowercase and collapse whitespace so trivial variations share a cache entry"""
+    return ' '.join(text.lower().split())
+
+class LRUCache:
+    """Size-bounded in-memory LRU with per-entry TTL"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.time() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class SQLiteCache:
+    """On-disk key/value store with TTL that several processes can share.
+    Every `purge_every` writes, expired rows are deleted and the table is
+    trimmed to the `max_entries` rows that expire last.
+    """
+
+    def __init__(self, path, ttl, max_entries=None, purge_every=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries or EMBEDDING_CACHE_SHARED_SIZE
+        self.purge_every = purge_every or EMBEDDING_CACHE_PURGE_EVERY
+        self.writes = 0
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        self.purge()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl)
+            )
+        with self.lock:
+            self.writes += 1
+            due = self.writes % self.purge_every == 0
+        if due:
+            self.purge()
+
+    def purge(self):
+        """Delete expired rows, then the soonest-expiring rows beyond max_entries"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+class EmbeddingCache:
+    """Query-embedding cache keyed on normalized text, task type, dimensionality,
+    model and title. Lookups hit the in-process LRU first and then the optional
+    shared SQLite backend, which is also used to fill the LRU on a hit.
+
+    The shared backend is disk I/O that can wait on other processes' locks,
+    so async callers do the `get_local` / `set_local` halves inline and run
+    `get_shared` / `set_shared` on a thread pool. `get` and `set` do both.
+    """
+
+    def __init__(self, max_size=None, ttl=None, path=None):
+        ttl = ttl or EMBEDDING_CACHE_TTL
+        self.memory = LRUCache(max_size or EMBEDDING_CACHE_SIZE, ttl)
+        path = path or EMBEDDING_CACHE_PATH
+        self.shared = SQLiteCache(path, ttl) if path else None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text, task_type, dimensions, model, title=""):
+        raw = "\x1f".join([normalize_query(text), task_type, str(dimensions), model, title or ""])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, hits=0, shared_hits=0, misses=0):
+        # Lookups run on pool threads too, so the counters share the entries' lock
+        with self.memory.lock:
+            self.hits += hits
+            self.shared_hits += shared_hits
+            self.misses += misses
+
+    def get_local(self, key):
+        """In-process lookup; a miss only counts as one when there is no shared backend to ask"""
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(hits=1)
+        elif self.shared is None:
+            self._count(misses=1)
+        return value
+
+    def get_shared(self, key):
+        """Shared backend lookup after a local miss (blocking)"""
+        value = None
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except sqlite3.Error as e:
+                print(f"Error reading embedding cache: {str(e)}")
+        if value is None:
+            self._count(misses=1)
+            return None
+        self._count(hits=1, shared_hits=1)
+        self.memory.set(key, value)
+        return value
+
+    def get(self, key):
+        value = self.get_local(key)
+        if value is None and self.shared is not None:
+            value = self.get_shared(key)
+        return value
+
+    def set_local(self, key, value):
+        value = list(value)
+        self.memory.set(key, value)
+        return value
+
+    def set_shared(self, key, value):
+        """Write to the shared backend (blocking)"""
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(key, list(value))
+        except sqlite3.Error as e:
+            print(f"Error writing embedding cache: {str(e)}")
+
+    def set(self, key, value):
+        self.set_shared(key, self.set_local(key, value))
+
+    def stats(self):
+        with self.memory.lock:
+            hits, shared_hits, misses = self.hits, self.shared_hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "shared_hits": shared_hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.memory),
+            "max_size": self.memory.max_size,
+            "ttl_seconds": self.memory.ttl,
+            "shared_backend": self.shared.path if self.shared else None
+        }
+
+class SemanticResponseCache:
+    """Full-response cache keyed on the query embedding.
+    A lookup returns the stored response of the most similar cached query when
+    its cosine similarity is at or above the threshold. Entries are grouped by
+    namespace (endpoint and request options). Lookups and stores pass the
+    {stack: version} of the collections the namespace searches; when a stack's
+    version changes, only the namespaces searching that stack are dropped.
+
+    Namespaces include request filters, so their number is up to the clients:
+    `max_size` bounds the entries across all namespaces (least recently used
+    first), and every store drops expired entries wherever they are.
+    """
+
+    def __init__(self, threshold=None, max_size=None, ttl=None):
+        self.threshold = threshold if threshold is not None else SEMANTIC_CACHE_THRESHOLD
+        self.max_size = max_size or SEMANTIC_CACHE_SIZE
+        self.ttl = ttl or SEMANTIC_CACHE_TTL
+        self.versions = {}
+        self.namespaces = {}
+        # (namespace, key) of every entry, least recently used first
+        self.recency = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_versions(self, versions):
+        changed = {stack for stack, version in versions.items() if self.versions.get(stack, version) != version}
+        self.versions.update(versions)
+        if changed:
+            self.invalidations += 1
+            for namespace in [n for n, space in self.namespaces.items() if space['stacks'] & changed]:
+                for key in list(self.namespaces[namespace]['entries']):
+                    self._remove(namespace, key)
+
+    def _remove(self, namespace, key):
+        space = self.namespaces[namespace]
+        del space['entries'][key]
+        space['matrix'] = None
+        self.recency.pop((namespace, key), None)
+        if not space['entries']:
+            del self.namespaces[namespace]
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [
+            (namespace, key) for namespace, space in self.namespaces.items()
+            for key, entry in space['entries'].items() if entry['expires_at'] < now
+        ]
+        for namespace, key in expired:
+            self._remove(namespace, key)
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, namespace, embedding, versions):
+        with self.lock:
+            self._check_versions(versions)
+            space = self.namespaces.get(namespace)
+            if not space:
+                self.misses += 1
+                return None
+
+            # Drop expired entries before scoring
+            now = time.time()
+            for key in [key for key, entry in space['entries'].items() if entry['expires_at'] < now]:
+                self._remove(namespace, key)
+            if namespace not in self.namespaces:
+                self.misses += 1
+                return None
+
+            if space['matrix'] is None:
+                space['keys'] = list(space['entries'].keys())
+                space['matrix'] = np.stack([space['entries'][key]['vector'] for key in space['keys']])
+
+            scores = space['matrix'] @ self._normalize(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = space['keys'][best]
+            self.recency.move_to_end((namespace, key))
+            self.hits += 1
+            return space['entries'][key]['response']
+
+    def store(self, namespace, embedding, versions, response):
+        with self.lock:
+            # A response built before a collection changed is not stored under the new version
+            if any(self.versions.get(stack, version) != version for stack, version in versions.items()):
+                return
+            self.versions.update(versions)
+            self._purge_expired()
+            space = self.namespaces.setdefault(
+                namespace, {'entries': {}, 'keys': [], 'matrix': None, 'stacks': set(versions)}
+            )
+            vector = self._normalize(embedding)
+            key = hashlib.sha256(vector.tobytes()).hexdigest()
+            space['entries'][key] = {
+                'vector': vector,
+                'response': response,
+                'expires_at': time.time() + self.ttl
+            }
+            space['matrix'] = None
+            self.recency[(namespace, key)] = None
+            self.recency.move_to_end((namespace, key))
+            while len(self.recency) > self.max_size:
+                self._remove(*next(iter(self.recency)))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self.recency),
+            "namespaces": len(self.namespaces),
+            "threshold": self.threshold,
+            "collection_versions": dict(self.versions)
+        }
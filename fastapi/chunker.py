@@ -0,0 +1,224 @@
+import os
+import re
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+MARKDOWN_HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}\s+\S")
+
+# Scraped pages are element.text dumps, so headings are short lines without
+# sentence punctuation rather than markdown '#' lines
+MAX_PLAIN_HEADING_CHARS = 60
+SENTENCE_ENDINGS = ('.', ':', ';', ',', '!', '?', ')', ']', '}', '"', "'")
+
+_encoding = None
+
+def _get_encoding():
+    """Load the tiktoken encoding once; False means it is unavailable"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating tokens from characters: {str(e)}")
+            _encoding = False
+    return _encoding
+
+def count_tokens(text):
+    """Count tokens with tiktoken, falling back to the 4 characters per token estimate"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def is_heading(line, next_line):
+    stripped = line.strip()
+    if MARKDOWN_HEADING_PATTERN.match(line):
+        return True
+    if not stripped or len(stripped) > MAX_PLAIN_HEADING_CHARS or stripped.endswith(SENTENCE_ENDINGS):
+        return False
+    # A title-like line introduces a longer body line
+    return next_line is not None and len(next_line.strip()) > len(stripped)
+
+def split_blocks(content):
+    """Single pass over the page producing structural blocks.
+
+    Each block is (start, end, kind) with character offsets into `content`.
+    kind is 'heading', 'code' (a whole fenced block), 'text' or 'break'
+    (a blank line, which marks a paragraph boundary).
+    """
+    blocks = []
+    lines = content.splitlines(keepends=True)
+    position = 0
+    fence_start = None
+    fence_marker = None
+
+    for index, line in enumerate(lines):
+        start = position
+        position += len(line)
+
+        if fence_start is not None:
+            if line.strip().startswith(fence_marker):
+                blocks.append((fence_start, position, 'code'))
+                fence_start = None
+            continue
+
+        fence = FENCE_PATTERN.match(line)
+        if fence:
+            fence_start = start
+            fence_marker = fence.group(1)
+            continue
+
+        if not line.strip():
+            blocks.append((start, position, 'break'))
+            continue
+
+        next_line = lines[index + 1] if index + 1 < len(lines) else None
+        kind = 'heading' if is_heading(line, next_line) else 'text'
+        blocks.append((start, position, kind))
+
+    # An unterminated fence runs to the end of the page
+    if fence_start is not None:
+        blocks.append((fence_start, position, 'code'))
+    return blocks
+
+def _hard_split(content, start, end, max_tokens):
+    """Cut a run without any whitespace into pieces of at most max_tokens"""
+    pieces = []
+    while start < end:
+        remaining = count_tokens(content[start:end])
+        if remaining <= max_tokens:
+            pieces.append((start, end, remaining))
+            break
+        # Guess the cut from the average characters per token, then back off until it fits
+        length = max(1, (end - start) * max_tokens // remaining)
+        tokens = count_tokens(content[start:start + length])
+        while tokens > max_tokens and length > 1:
+            length = max(1, length * max_tokens // tokens)
+            tokens = count_tokens(content[start:start + length])
+        pieces.append((start, start + length, tokens))
+        start += length
+    return pieces
+
+def _split_oversized(content, start, end, max_tokens):
+    """Cut a single block that exceeds the budget at line, then word, boundaries"""
+    units = []
+    for line in re.finditer(r"[^\n]*\n?", content[start:end]):
+        if not line.group():
+            continue
+        line_start = start + line.start()
+        line_tokens = count_tokens(line.group())
+        if line_tokens <= max_tokens:
+            units.append((line_start, start + line.end(), line_tokens))
+            continue
+        # Very long lines fall back to word boundaries, and unbreakable runs to characters
+        for word in re.finditer(r"\S+\s*|\s+", line.group()):
+            word_start = line_start + word.start()
+            word_tokens = count_tokens(word.group())
+            if word_tokens <= max_tokens:
+                units.append((word_start, line_start + word.end(), word_tokens))
+            else:
+                units.extend(_hard_split(content, word_start, line_start + word.end(), max_tokens))
+
+    pieces = []
+    piece_start = start
+    piece_tokens = 0
+    for unit_start, unit_end, unit_tokens in units:
+        if piece_tokens and piece_tokens + unit_tokens > max_tokens:
+            pieces.append((piece_start, unit_start, piece_tokens))
+            piece_start = unit_start
+            piece_tokens = 0
+        piece_tokens += unit_tokens
+    if piece_start < end:
+        pieces.append((piece_start, end, piece_tokens))
+    return pieces
+
+def chunk_text(content, max_tokens=None, overlap_tokens=None):
+    """Split a page into coherent chunks within a token budget.
+
+    Chunks break at heading and paragraph boundaries where possible, never
+    inside a fenced code block unless the block alone exceeds the budget, and
+    repeat up to `overlap_tokens` of trailing blocks at the start of the next
+    chunk. Returns dicts with 'text', 'start', 'end' and 'tokens', where
+    content[start:end] is the chunk in the original page.
+    """
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    # Measure every block once; oversized blocks are pre-split into budget-sized pieces
+    units = []
+    for start, end, kind in split_blocks(content):
+        if kind == 'break':
+            units.append((start, end, kind, 0))
+            continue
+        tokens = count_tokens(content[start:end])
+        if tokens > max_tokens:
+            # A heading right before the block goes with its first piece
+            heading = len(units)
+            while heading and units[heading - 1][2] == 'break':
+                heading -= 1
+            if heading and units[heading - 1][2] == 'heading':
+                start = units[heading - 1][0]
+                del units[heading - 1:]
+            for piece_start, piece_end, piece_tokens in _split_oversized(content, start, end, max_tokens):
+                units.append((piece_start, piece_end, kind, piece_tokens))
+        else:
+            units.append((start, end, kind, tokens))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def emit():
+        start = current[0][0]
+        end = current[-1][1]
+        text = content[start:end].strip()
+        if text:
+            # Keep the offsets pointing at the stripped text
+            start += len(content[start:end]) - len(content[start:end].lstrip())
+            chunks.append({
+                "text": text,
+                "start": start,
+                "end": start + len(text),
+                "tokens": current_tokens
+            })
+
+    for unit in units:
+        start, end, kind, tokens = unit
+        if kind == 'break' and not current:
+            continue
+
+        # Close the chunk before a heading once it is reasonably full, or when the budget is hit
+        starts_section = kind == 'heading' and current_tokens >= max_tokens // 2
+        if current and (starts_section or current_tokens + tokens > max_tokens):
+            emit()
+
+            # Carry trailing blocks over as overlap, but never a dangling heading
+            # and never across a section boundary
+            carried = []
+            carried_tokens = 0
+            for previous in ([] if starts_section else reversed(current)):
+                if carried_tokens + previous[3] > overlap_tokens or previous[2] == 'code':
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[3]
+            while carried and carried[-1][2] in ('heading', 'break'):
+                carried_tokens -= carried.pop()[3]
+            if carried_tokens + tokens > max_tokens:
+                carried, carried_tokens = [], 0
+            current = carried
+            current_tokens = carried_tokens
+
+        if kind == 'break' and not current:
+            continue
+        current.append(unit)
+        current_tokens += tokens
+
+    if current and any(unit[2] != 'break' for unit in current):
+        emit()
+    return chunks
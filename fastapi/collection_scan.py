@@ -0,0 +1,73 @@
+import os
+import time
+import tracemalloc
+
+# Records fetched per collection.get call during full-collection passes
+SCAN_PAGE_SIZE = int(os.getenv("SCAN_PAGE_SIZE", "500"))
+
+class CollectionScan:
+    """Page through a whole Chroma collection with limit/offset gets.
+
+    Iterating yields one page at a time (the dict collection.get returns), so
+    memory stays bounded by the page size instead of the collection size.
+    Progress is available while iterating through `scanned`, `pages` and
+    `total`; with `track_memory` the peak Python allocation during the scan
+    is recorded in `peak_memory`.
+    """
+
+    def __init__(self, collection, include=None, page_size=None, label=None, track_memory=False):
+        self.collection = collection
+        self.include = [] if include is None else include
+        self.page_size = page_size or SCAN_PAGE_SIZE
+        self.label = label
+        self.track_memory = track_memory
+        self.total = None
+        self.scanned = 0
+        self.pages = 0
+        self.elapsed = 0.0
+        self.peak_memory = None
+
+    def __iter__(self):
+        started = time.perf_counter()
+        tracing = self.track_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.track_memory:
+            tracemalloc.reset_peak()
+        try:
+            self.total = self.collection.count()
+            while self.scanned < self.total:
+                page = self.collection.get(limit=self.page_size, offset=self.scanned, include=self.include)
+                if not page['ids']:
+                    break
+                self.scanned += len(page['ids'])
+                self.pages += 1
+                if self.label:
+                    print(f"{self.label}: {self.scanned}/{self.total} records")
+                yield page
+        finally:
+            self.elapsed = time.perf_counter() - started
+            if self.track_memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                if tracing:
+                    tracemalloc.stop()
+
+    def records(self):
+        """Yield (id, metadata, document) per record; fields not included are None"""
+        for page in self:
+            metadatas = page.get('metadatas') or [None] * len(page['ids'])
+            documents = page.get('documents') or [None] * len(page['ids'])
+            yield from zip(page['ids'], metadatas, documents)
+
+    def summary(self):
+        summary = f"Scanned {self.scanned} records in {self.pages} pages of {self.page_size} in {self.elapsed:.2f}s"
+        if self.peak_memory is not None:
+            summary += f", peak memory {self.peak_memory / (1 << 20):.1f} MiB"
+        return summary
+
+def scan_ids(collection, page_size=None):
+    """Every id in the collection, fetched page by page"""
+    ids = []
+    for page in CollectionScan(collection, include=[], page_size=page_size):
+        ids.extend(page['ids'])
+    return ids
@@ -0,0 +1,197 @@
+import json
+import uuid
+from collection_scan import CollectionScan
+
+# Statistics live in a one-record companion collection so they travel with the Chroma data
+STATS_RECORD_ID = "stats"
+STATS_VERSION = 1
+
+PERCENTILES = (50, 90, 95, 99)
+
+def stats_collection_name(collection_name):
+    return f"{collection_name}_stats"
+
+def url_domain(url):
+    return url.split('//')[1].split('/')[0] if '//' in url else url.split('/')[0]
+
+def _increment(counts, key, amount):
+    counts[key] = counts.get(key, 0) + amount
+    if counts[key] <= 0:
+        del counts[key]
+
+def histogram_percentiles(histogram, percentiles=PERCENTILES):
+    """Exact nearest-rank percentiles from a {value: count} histogram"""
+    total = sum(histogram.values())
+    if not total:
+        return {f"p{p}": 0 for p in percentiles}
+    values = sorted(histogram)
+    result = {}
+    for p in percentiles:
+        rank = max(1, -(-p * total // 100))
+        seen = 0
+        for value in values:
+            seen += histogram[value]
+            if seen >= rank:
+                result[f"p{p}"] = value
+                break
+    return result
+
+class CollectionStats:
+    """Aggregate statistics for a chunk collection, updated chunk by chunk.
+
+    Everything is kept as counters (per title, URL domain and parent document)
+    and {size: count} histograms of chunk characters and tokens, so chunks can
+    be added and removed without rescanning, and the report is computed from
+    these small tables rather than from the records.
+    """
+
+    def __init__(self, collection_id=None):
+        self.collection_id = collection_id
+        self.total_chunks = 0
+        self.total_chars = 0
+        self.titles = {}
+        self.url_domains = {}
+        self.parent_chunks = {}
+        self.char_histogram = {}
+        self.token_histogram = {}
+
+    def _apply(self, metadata, document, sign):
+        metadata = metadata or {}
+        self.total_chunks += sign
+        self.total_chars += sign * len(document or "")
+        _increment(self.titles, metadata.get('title', 'untitled'), sign)
+        url = metadata.get('url', '')
+        if url:
+            _increment(self.url_domains, url_domain(url), sign)
+        _increment(self.parent_chunks, metadata.get('id_parent', ''), sign)
+        _increment(self.char_histogram, len(document or ""), sign)
+        if 'chunk_tokens' in metadata:
+            try:
+                _increment(self.token_histogram, int(metadata['chunk_tokens']), sign)
+            except (ValueError, TypeError):
+                pass
+
+    def add(self, metadata, document):
+        self._apply(metadata, document, 1)
+
+    def remove(self, metadata, document):
+        self._apply(metadata, document, -1)
+
+    def to_dict(self):
+        return {
+            "version": STATS_VERSION,
+            "collection_id": self.collection_id,
+            "total_chunks": self.total_chunks,
+            "total_chars": self.total_chars,
+            "titles": self.titles,
+            "url_domains": self.url_domains,
+            "parent_chunks": self.parent_chunks,
+            # JSON object keys are strings
+            "char_histogram": {str(k): v for k, v in self.char_histogram.items()},
+            "token_histogram": {str(k): v for k, v in self.token_histogram.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data.get("collection_id"))
+        stats.total_chunks = data["total_chunks"]
+        stats.total_chars = data["total_chars"]
+        stats.titles = data["titles"]
+        stats.url_domains = data["url_domains"]
+        stats.parent_chunks = data["parent_chunks"]
+        stats.char_histogram = {int(k): v for k, v in data["char_histogram"].items()}
+        stats.token_histogram = {int(k): v for k, v in data["token_histogram"].items()}
+        return stats
+
+    @classmethod
+    def from_collection(cls, collection, page_size=None, track_memory=False):
+        """Compute the statistics with one paginated pass over the collection"""
+        stats = cls(str(collection.id))
+        scan = CollectionScan(collection, include=['metadatas', 'documents'], page_size=page_size, track_memory=track_memory)
+        for _, metadata, document in scan.records():
+            stats.add(metadata, document)
+        print(scan.summary())
+        return stats
+
+    def report(self, collection_name):
+        """The /chromadb-stats response"""
+        multi_chunk_docs = sum(1 for count in self.parent_chunks.values() if count > 1)
+        top_titles = sorted(self.titles.items(), key=lambda x: x[1], reverse=True)[:10]
+        return {
+            "collection_info": {
+                "name": collection_name,
+                "total_records": self.total_chunks,
+                "unique_documents": len(self.parent_chunks),
+                "multi_chunk_documents": multi_chunk_docs,
+                "max_chunks_per_document": max(self.parent_chunks.values()) if self.parent_chunks else 0
+            },
+            "content_statistics": {
+                "total_chunks": self.total_chunks,
+                "avg_chunk_size": self.total_chars / self.total_chunks if self.total_chunks else 0,
+                "max_chunk_size": max(self.char_histogram) if self.char_histogram else 0,
+                "min_chunk_size": min(self.char_histogram) if self.char_histogram else 0,
+                "chunk_size_percentiles": histogram_percentiles(self.char_histogram),
+                "chunk_token_percentiles": histogram_percentiles(self.token_histogram),
+                "multi_chunk_docs": multi_chunk_docs
+            },
+            "document_titles": {
+                "unique_titles": len(self.titles),
+                "top_titles": dict(top_titles)
+            },
+            "url_domains": self.url_domains
+        }
+
+def load_stats(chroma_client, collection_name):
+    """Read the persisted statistics, or None when there are none"""
+    try:
+        record = chroma_client.get_collection(stats_collection_name(collection_name)).get(
+            ids=[STATS_RECORD_ID], include=['documents']
+        )
+    except Exception:
+        return None
+    if not record['ids']:
+        return None
+    data = json.loads(record['documents'][0])
+    if data.get("version") != STATS_VERSION:
+        return None
+    return CollectionStats.from_dict(data)
+
+def save_stats(chroma_client, collection_name, stats):
+    """Persist the statistics. Ingest saves them after every change to the collection,
+    so the record also carries a fresh content version stamp for the response caches"""
+    stats_collection = chroma_client.get_or_create_collection(stats_collection_name(collection_name))
+    stats_collection.upsert(
+        ids=[STATS_RECORD_ID],
+        documents=[json.dumps(stats.to_dict())],
+        metadatas=[{"content_version": uuid.uuid4().hex[:16]}],
+        # Chroma requires an embedding per record; the stats record is never searched
+        embeddings=[[0.0]]
+    )
+
+def load_content_version(chroma_client, collection_name):
+    """Version stamp written with the statistics, or None when there is none"""
+    try:
+        record = chroma_client.get_collection(stats_collection_name(collection_name)).get(
+            ids=[STATS_RECORD_ID], include=['metadatas']
+        )
+    except Exception:
+        return None
+    if not record['ids']:
+        return None
+    return (record['metadatas'][0] or {}).get("content_version")
+
+def delete_stats(chroma_client, collection_name):
+    try:
+        chroma_client.delete_collection(stats_collection_name(collection_name))
+    except Exception:
+        pass
+
+def current_stats(chroma_client, collection, collection_name):
+    """Persisted statistics if they still describe the collection, otherwise recomputed and saved"""
+    stats = load_stats(chroma_client, collection_name)
+    if stats is not None and stats.collection_id == str(collection.id) and stats.total_chunks == collection.count():
+        return stats
+    print(f"Recomputing statistics for collection {collection_name}")
+    stats = CollectionStats.from_collection(collection)
+    save_stats(chroma_client, collection_name, stats)
+    return stats
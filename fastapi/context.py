@@ -0,0 +1,120 @@
+import os
+import re
+import zlib
+import numpy as np
+from chunker import count_tokens
+from retrieval import vector_similarity
+
+# Pack the summary prompt's snippets instead of concatenating every result
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "true").lower() == "true"
+# Tokens of documentation snippets sent to Gemini per summary
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+# Snippets whose estimated shingle Jaccard similarity reaches this are near-duplicates
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+
+SHINGLE_WORDS = 5
+MINHASH_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(1)
+_PERMUTATION_A = _rng.randint(1, 1 << 31, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+_PERMUTATION_B = _rng.randint(0, 1 << 31, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+
+def _position(result):
+    metadata = result['metadata']
+    try:
+        return int(metadata['chunk_index']), int(metadata['chunk_start']), int(metadata['chunk_end'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def merge_adjacent(results):
+    """Merge retrieved chunks that are consecutive pieces of the same page.
+
+    The merged snippet takes the place of its best-ranked piece, keeps the
+    best similarity score, and drops the overlap the chunker repeated at the
+    start of each following chunk (using the stored chunk offsets).
+    """
+    groups = {}
+    order = []
+    for rank, result in enumerate(results):
+        position = _position(result)
+        if position is None:
+            order.append((rank, [result]))
+            continue
+        key = (result.get('tech_stack'), result['metadata'].get('id_parent'))
+        groups.setdefault(key, []).append((position, rank, result))
+
+    for pieces in groups.values():
+        pieces.sort(key=lambda piece: piece[0][0])
+        run = [pieces[0]]
+        for piece in pieces[1:]:
+            if piece[0][0] == run[-1][0][0] + 1:
+                run.append(piece)
+            else:
+                order.append((min(p[1] for p in run), [p[2] for p in run]))
+                run = [piece]
+        order.append((min(p[1] for p in run), [p[2] for p in run]))
+
+    merged = []
+    for _, run in sorted(order, key=lambda item: item[0]):
+        if len(run) == 1:
+            merged.append(run[0])
+            continue
+        text = run[0]['document']
+        end = _position(run[0])[2]
+        for result in run[1:]:
+            _, start, next_end = _position(result)
+            if start < end:
+                # The overlap ends exactly where the previous chunk ended
+                text += result['document'][end - start:]
+            else:
+                text += "\n" + result['document']
+            end = next_end
+        best = max(run, key=vector_similarity)
+        merged.append({**best, 'document': text})
+    return merged
+
+def minhash_signature(text):
+    """MinHash signature over word shingles of the text"""
+    words = re.findall(r"\w+", text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in shingles], dtype=np.uint64)
+    permuted = (np.outer(hashes, _PERMUTATION_A) + _PERMUTATION_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+def drop_near_duplicates(results, threshold=None):
+    """Keep the best-ranked of every group of near-duplicate snippets"""
+    threshold = CONTEXT_DEDUP_THRESHOLD if threshold is None else threshold
+    kept = []
+    signatures = []
+    for result in results:
+        signature = minhash_signature(result['document'])
+        if any(np.mean(signature == other) >= threshold for other in signatures):
+            continue
+        kept.append(result)
+        signatures.append(signature)
+    return kept
+
+def pack_to_budget(results, token_budget=None):
+    """Greedily keep snippets in rank order while they fit in the token budget.
+    The best snippet is always kept, cut down to the budget if it is too long on its own.
+    """
+    token_budget = token_budget or CONTEXT_TOKEN_BUDGET
+    packed = []
+    used = 0
+    for result in results:
+        tokens = count_tokens(result['document'])
+        if used + tokens <= token_budget:
+            packed.append(result)
+            used += tokens
+        elif not packed:
+            # Characters per token from this snippet, to cut it roughly at the budget
+            cut = len(result['document']) * token_budget // tokens
+            packed.append({**result, 'document': result['document'][:cut]})
+            used = token_budget
+    return packed
+
+def pack_context(results, token_budget=None):
+    """Merge, de-duplicate and pack search results for the summary prompt"""
+    if not CONTEXT_PACKING or not results:
+        return results
+    return pack_to_budget(drop_near_duplicates(merge_adjacent(results)), token_budget)
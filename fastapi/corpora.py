@@ -0,0 +1,25 @@
+import os
+from ingest import COLLECTION_NAME
+
+# Scraped CSV corpora, one file per tech stack with a techStackName column
+CSV_CORPUS_DIR = os.getenv("CSV_CORPUS_DIR", os.path.join("..", "Scrappers", "Csv_Output_Of_Each_Scrapper_Code"))
+
+# Every tech stack is indexed into its own collection: `source` is the corpus
+# file and the stack name is also its key inside that file
+CORPORA = {
+    "golem": {"collection": COLLECTION_NAME, "source": "golem_docs.yaml"},
+    "react": {"collection": "react_docs_v1", "source": os.path.join(CSV_CORPUS_DIR, "docs_react.csv")},
+    "nextjs": {"collection": "nextjs_docs_v1", "source": os.path.join(CSV_CORPUS_DIR, "docs_nextjs.csv")},
+    "astro": {"collection": "astro_docs_v1", "source": os.path.join(CSV_CORPUS_DIR, "astro_docs.csv")},
+    "kestra": {"collection": "kestra_docs_v1", "source": os.path.join(CSV_CORPUS_DIR, "kestra_docs.csv")},
+    "redux": {"collection": "redux_docs_v1", "source": os.path.join(CSV_CORPUS_DIR, "docs_redux.csv")},
+}
+
+# Stacks the API serves; queries without a tech_stack search all of them
+TECH_STACKS = [stack.strip() for stack in os.getenv("TECH_STACKS", "golem").split(",") if stack.strip()]
+
+def collection_for(stack):
+    return CORPORA[stack]["collection"]
+
+def source_for(stack):
+    return CORPORA[stack]["source"]
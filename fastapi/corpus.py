@@ -0,0 +1,168 @@
+import os
+import sys
+import csv
+import json
+import hashlib
+import yaml
+
+# Prefer the libyaml-backed loader; fall back to pure Python when PyYAML was built without it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+SNAPSHOT_VERSION = 1
+
+def load_yaml(path):
+    """Parse a YAML file with the fastest available safe loader"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return yaml.load(file, Loader=SafeLoader)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def snapshot_paths(yaml_path):
+    """Return (data_path, meta_path) for the snapshot of a YAML corpus"""
+    base = os.path.splitext(yaml_path)[0]
+    return f"{base}.snapshot.jsonl", f"{base}.snapshot.json"
+
+def write_snapshot(yaml_path, data, source_hash=None):
+    """Compile parsed YAML into a JSONL snapshot plus a metadata file of byte offsets.
+    Every top-level key maps to a list of documents, one JSON line each.
+    """
+    data_path, meta_path = snapshot_paths(yaml_path)
+    stat = os.stat(yaml_path)
+    sections = {}
+
+    # Invalidate the old snapshot first so a crash mid-write never leaves mismatched files
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    with open(data_path, 'wb') as file:
+        for key, docs in data.items():
+            offsets = []
+            for doc in docs or []:
+                offsets.append(file.tell())
+                file.write(json.dumps(doc, ensure_ascii=False).encode('utf-8') + b"\n")
+            sections[key] = offsets
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "source_sha256": source_hash or file_sha256(yaml_path),
+        "sections": sections
+    }
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, meta_path)
+    return meta
+
+def read_snapshot_meta(yaml_path):
+    """Return the snapshot metadata if it still describes the YAML file, otherwise None"""
+    data_path, meta_path = snapshot_paths(yaml_path)
+    if not os.path.exists(data_path) or not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    stat = os.stat(yaml_path)
+    if meta["source_mtime_ns"] == stat.st_mtime_ns and meta["source_size"] == stat.st_size:
+        return meta
+
+    # The file was touched; it is only stale if the content changed too
+    if meta["source_size"] == stat.st_size and meta["source_sha256"] == file_sha256(yaml_path):
+        meta["source_mtime_ns"] = stat.st_mtime_ns
+        with open(meta_path, 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+        return meta
+    return None
+
+def read_snapshot(yaml_path, meta):
+    data_path, _ = snapshot_paths(yaml_path)
+    data = {}
+    with open(data_path, 'rb') as file:
+        lines = file.read().splitlines()
+    position = 0
+    for key, offsets in meta["sections"].items():
+        data[key] = [json.loads(line) for line in lines[position:position + len(offsets)]]
+        position += len(offsets)
+    return data
+
+def read_doc(yaml_path, key, index, meta=None):
+    """Random access to one document of a snapshot through its byte offset"""
+    meta = meta or read_snapshot_meta(yaml_path)
+    if meta is None:
+        raise ValueError(f"No up-to-date snapshot for {yaml_path}")
+    data_path, _ = snapshot_paths(yaml_path)
+    with open(data_path, 'rb') as file:
+        file.seek(meta["sections"][key][index])
+        return json.loads(file.readline())
+
+def load_corpus(yaml_path, use_snapshot=True):
+    """Load the documentation corpus, reusing the compiled snapshot while the YAML
+    is unchanged and rebuilding it otherwise.
+    """
+    if not use_snapshot:
+        return load_yaml(yaml_path)
+
+    meta = read_snapshot_meta(yaml_path)
+    if meta is not None:
+        try:
+            return read_snapshot(yaml_path, meta)
+        except (OSError, ValueError) as e:
+            print(f"Error reading corpus snapshot, reparsing YAML: {str(e)}")
+
+    data = load_yaml(yaml_path) or {}
+    try:
+        write_snapshot(yaml_path, data)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error writing corpus snapshot: {str(e)}")
+    return data
+
+def _slug_title(slug):
+    return slug.replace('-', ' ').replace('_', ' ').capitalize()
+
+def csv_doc(id_parent, row):
+    """Shape a scraped CSV row like a YAML corpus entry.
+    Title and section come from the URL path the same way the Golem scraper derives them.
+    """
+    # The scrapers wrapped every page in triple quotes
+    content = row.get('content', '').strip().strip('"').strip()
+    url = row.get('url', '')
+    path = [part for part in url.split('//', 1)[-1].split('/')[1:] if part]
+    return {
+        "id_parent": id_parent,
+        "title": _slug_title(path[-1]) if path else "Home",
+        "url": url,
+        "content": content,
+        "section": _slug_title(path[0]) if path else "Home",
+        "char_count": len(content),
+        "approx_token_count": int(row['token_count']) if row.get('token_count', '').isdigit() else len(content) // 4
+    }
+
+def load_csv_corpus(csv_path):
+    """Load a scraped CSV corpus as {techStackName: [documents]}"""
+    csv.field_size_limit(sys.maxsize)
+    data = {}
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            docs = data.setdefault(row.get('techStackName') or 'unknown', [])
+            docs.append(csv_doc(len(docs) + 1, row))
+    return data
+
+def load_corpus_file(path):
+    """Load a YAML or CSV corpus into {corpus key: [documents]}"""
+    if path.endswith('.csv'):
+        return load_csv_corpus(path)
+    return load_corpus(path)
@@ -0,0 +1,96 @@
+import os
+import sys
+import argparse
+import chromadb
+from google import genai
+from dotenv import load_dotenv
+from ingest import load_golem_docs_to_chroma, print_collection_summary, verify_collection
+from vector_store import export_local_index
+from corpora import CORPORA, collection_for, source_for
+from collection_stats import delete_stats
+
+def get_clients():
+    load_dotenv()
+    client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+    chroma_client = chromadb.HttpClient(
+        host=os.getenv("CHROMA_SERVER_HOST"),
+        port=8000
+    )
+    return client, chroma_client
+
+def build(args):
+    """Drop the collection and index the whole corpus from scratch"""
+    client, chroma_client = get_clients()
+    try:
+        chroma_client.delete_collection(args.collection)
+        print(f"Deleted existing collection {args.collection}")
+    except Exception:
+        pass
+    delete_stats(chroma_client, args.collection)
+    return load_golem_docs_to_chroma(client, chroma_client, args.source, collection_name=args.collection, corpus_key=args.stack)
+
+def update(args):
+    """Embed only new or changed chunks and delete vanished ones"""
+    client, chroma_client = get_clients()
+    return load_golem_docs_to_chroma(client, chroma_client, args.source, collection_name=args.collection, corpus_key=args.stack)
+
+def verify(args):
+    """Check that the collection matches the corpus without embedding anything"""
+    _, chroma_client = get_clients()
+    try:
+        report = verify_collection(chroma_client, args.source, collection_name=args.collection, corpus_key=args.stack)
+    except Exception as e:
+        print(f"Error verifying collection {args.collection}: {str(e)}")
+        return False
+
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    if args.summary:
+        print_collection_summary(chroma_client.get_collection(args.collection))
+    return report["in_sync"]
+
+def export(args):
+    """Write the collection out as an in-process index for VECTOR_STORE=local"""
+    _, chroma_client = get_clients()
+    try:
+        export_local_index(chroma_client, args.path, collection_name=args.collection)
+    except Exception as e:
+        print(f"Error exporting collection {args.collection}: {str(e)}")
+        return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="doc0-index",
+        description="Build and maintain the Golem documentation index offline"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    commands = {
+        "build": (build, "Rebuild the collection from scratch"),
+        "update": (update, "Incrementally sync the collection with the corpus"),
+        "verify": (verify, "Report whether the collection matches the corpus"),
+        "export": (export, "Export the collection as a local vector index"),
+    }
+    for name, (func, help_text) in commands.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("--stack", default="golem", choices=list(CORPORA), help="Tech stack corpus to index")
+        subparser.add_argument("--source", "--yaml", dest="source", default=None,
+                               help="Path to the corpus YAML or CSV (defaults to the stack's corpus)")
+        subparser.add_argument("--collection", default=None, help="ChromaDB collection name (defaults to the stack's collection)")
+        if name == "verify":
+            subparser.add_argument("--summary", action="store_true", help="Also print chunks per parent document")
+        if name == "export":
+            subparser.add_argument("--path", default=None, help="Directory to write the local index to")
+        subparser.set_defaults(func=func)
+
+    args = parser.parse_args()
+    args.source = args.source or source_for(args.stack)
+    args.collection = args.collection or collection_for(args.stack)
+    if not os.path.exists(args.source):
+        print(f"Error: corpus file {args.source} not found")
+        return 1
+    return 0 if args.func(args) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
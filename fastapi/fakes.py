@@ -0,0 +1,93 @@
+"""Stand-ins for the Gemini and Chroma clients, used by the benchmarks and the load test.
+
+Nothing here is imported by the API or the ingestion code paths.
+"""
+import time
+import random
+import asyncio
+from ingest import EMBEDDING_DIMENSIONS
+
+class _Embedding:
+    def __init__(self, values):
+        self.values = values
+
+class _EmbedResponse:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+class _GenerateResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModels:
+    """Blocking stand-in for genai.Client().models with deterministic vectors.
+    Each call sleeps for its latency to mimic a round-trip.
+    """
+
+    def __init__(self, embed_latency=0.05, generate_latency=0.0, dimensions=EMBEDDING_DIMENSIONS):
+        self.embed_latency = embed_latency
+        self.generate_latency = generate_latency
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def _embed(self, contents):
+        self.calls += 1
+        if isinstance(contents, str):
+            contents = [contents]
+        return _EmbedResponse([_Embedding(self._vector(text)) for text in contents])
+
+    def _vector(self, text):
+        rng = random.Random(text)
+        return [rng.uniform(-1, 1) for _ in range(self.dimensions)]
+
+    def embed_content(self, model, contents, config=None):
+        time.sleep(self.embed_latency)
+        return self._embed(contents)
+
+    def generate_content(self, model, contents):
+        time.sleep(self.generate_latency)
+        return _GenerateResponse("stub summary")
+
+class FakeAsyncModels(FakeModels):
+    """Non-blocking stand-in for genai.Client().aio.models"""
+
+    async def embed_content(self, model, contents, config=None):
+        await asyncio.sleep(self.embed_latency)
+        return self._embed(contents)
+
+    async def generate_content(self, model, contents):
+        await asyncio.sleep(self.generate_latency)
+        return _GenerateResponse("stub summary")
+
+class _Aio:
+    def __init__(self, models):
+        self.models = models
+
+class FakeGenaiClient:
+    """Local stand-in for genai.Client with both the blocking and the async models"""
+
+    def __init__(self, embed_latency=0.05, generate_latency=0.0, dimensions=EMBEDDING_DIMENSIONS):
+        self.models = FakeModels(embed_latency, generate_latency, dimensions)
+        self.aio = _Aio(FakeAsyncModels(embed_latency, generate_latency, dimensions))
+
+class FakeCollection:
+    """Chroma collection that answers every query with n_results made-up documents"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        time.sleep(self.latency)
+        return {
+            'documents': [[f"document {i}" for i in range(n_results)] for _ in query_embeddings],
+            'metadatas': [[{'title': f"Doc {i}", 'url': f"https://learn.golem.cloud/{i}"} for i in range(n_results)]
+                          for _ in query_embeddings],
+            'distances': [[0.1 * i for i in range(n_results)] for _ in query_embeddings],
+        }
+
+class FakeChromaClient:
+    def __init__(self, latency):
+        self.collection = FakeCollection(latency)
+
+    def get_collection(self, name):
+        return self.collection
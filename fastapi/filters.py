@@ -0,0 +1,93 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+# Search filters are kept as a plain dict with any of these keys:
+#   section    list of section names, matched exactly
+#   url_prefix the chunk's page URL must start with this
+#   id_parent  list of parent document ids
+# Metadata values are stored as strings, so ids are compared as strings.
+
+# Distinct filters whose matching rows are remembered by each index
+FILTER_CACHE_SIZE = int(os.getenv("FILTER_CACHE_SIZE", "128"))
+
+def make_filter(section=None, url_prefix=None, id_parent=None):
+    """Normalize request filter fields into a search filter, or None when nothing is set"""
+    search_filter = {}
+    if section:
+        search_filter['section'] = [section] if isinstance(section, str) else list(section)
+    if url_prefix:
+        search_filter['url_prefix'] = url_prefix
+    if id_parent is not None and id_parent != []:
+        ids = id_parent if isinstance(id_parent, list) else [id_parent]
+        search_filter['id_parent'] = [str(i) for i in ids]
+    return search_filter or None
+
+def filter_key(search_filter):
+    """Stable string for cache namespaces"""
+    return json.dumps(search_filter, sort_keys=True) if search_filter else ""
+
+def matches_filter(metadata, search_filter):
+    if not search_filter:
+        return True
+    metadata = metadata or {}
+    if 'section' in search_filter and metadata.get('section') not in search_filter['section']:
+        return False
+    if 'url_prefix' in search_filter and not metadata.get('url', '').startswith(search_filter['url_prefix']):
+        return False
+    if 'id_parent' in search_filter and str(metadata.get('id_parent')) not in search_filter['id_parent']:
+        return False
+    return True
+
+def chroma_where(search_filter, parent_urls=None):
+    """Translate a search filter into a Chroma `where` clause.
+
+    Chroma has no prefix operator for metadata, so a URL prefix is resolved
+    to the matching parent ids through `parent_urls` ({id_parent: url}).
+    Returns (where, empty) where `empty` means nothing can match.
+    """
+    if not search_filter:
+        return None, False
+
+    id_parents = search_filter.get('id_parent')
+    if 'url_prefix' in search_filter:
+        prefixed = [
+            id_parent for id_parent, url in (parent_urls or {}).items()
+            if url.startswith(search_filter['url_prefix'])
+        ]
+        id_parents = [i for i in id_parents if i in prefixed] if id_parents is not None else prefixed
+        if not id_parents:
+            return None, True
+
+    clauses = []
+    if 'section' in search_filter:
+        clauses.append({'section': {'$in': search_filter['section']}})
+    if id_parents is not None:
+        clauses.append({'id_parent': {'$in': id_parents}})
+    if len(clauses) == 1:
+        return clauses[0], False
+    return {'$and': clauses}, False
+
+class FilterCache:
+    """Per-filter results of `compute(search_filter)` for the most recently used
+    filters. Filters come from requests, so at most `max_size` are kept."""
+
+    def __init__(self, compute, max_size=None):
+        self.compute = compute
+        self.max_size = max_size or FILTER_CACHE_SIZE
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, search_filter):
+        key = filter_key(search_filter)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        value = self.compute(search_filter)
+        with self.lock:
+            self.entries[key] = value
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return value
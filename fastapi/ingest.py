@@ -0,0 +1,419 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from google.genai.types import EmbedContentConfig
+from corpus import load_corpus, load_corpus_file
+from chunker import chunk_text
+from retrieval import BM25Index, KEYWORD_INDEX_PATH, keyword_index_path_for
+from collection_stats import current_stats, save_stats
+from collection_scan import CollectionScan, scan_ids
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_DIMENSIONS = 768
+COLLECTION_NAME = "golem_docs_v1"
+
+# The Gemini batch embedding endpoint accepts at most 100 contents per call
+MAX_BATCH_SIZE = 100
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "50"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "8"))
+
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+INGEST_CHECKPOINT_PATH = os.getenv("INGEST_CHECKPOINT_PATH", "ingest_checkpoint.txt")
+
+def checkpoint_path_for(collection_name):
+    """Each collection resumes from its own checkpoint, e.g. ingest_checkpoint.golem_docs.txt"""
+    base, extension = os.path.splitext(INGEST_CHECKPOINT_PATH)
+    return f"{base}.{collection_name}{extension}"
+
+# How a chunk is presented to the embedding model; part of the chunk id, so
+# changing it re-embeds every chunk on the next sync
+EMBEDDING_FORMAT = "title-inline-v1"
+
+def chunk_id(id_parent, chunk_index, text, metadata):
+    """Deterministic chunk id: parent id, chunk index and a hash of everything stored with the chunk"""
+    payload = json.dumps({"text": text, "metadata": metadata, "format": EMBEDDING_FORMAT},
+                         sort_keys=True, ensure_ascii=False)
+    content_hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    return f"{id_parent}-{chunk_index}-{content_hash}"
+
+def build_chunks(data, corpus_key="golem"):
+    """Split every entry under `corpus_key` into chunks ready for embedding.
+    Each chunk carries its text, the title used for embedding context and
+    the metadata stored alongside it in ChromaDB.
+    """
+    chunks = []
+    for doc in data.get(corpus_key, []):
+        content = doc.get('content', '')
+        if not content.strip():
+            continue
+
+        # Split content at structural boundaries within the token budget
+        content_chunks = chunk_text(content)
+        for i, chunk in enumerate(content_chunks):
+            # Create metadata directly from the YAML entry, excluding content
+            metadata = {k: str(v) for k, v in doc.items() if k != 'content'}
+
+            # Add chunk position information, with offsets back into the page content
+            metadata['chunk_index'] = str(i)
+            metadata['total_chunks'] = str(len(content_chunks))
+            metadata['chunk_start'] = str(chunk['start'])
+            metadata['chunk_end'] = str(chunk['end'])
+            metadata['chunk_tokens'] = str(chunk['tokens'])
+
+            chunks.append({
+                "id": chunk_id(doc.get('id_parent', 'unknown'), i, chunk['text'], metadata),
+                "text": chunk['text'],
+                "title": doc.get('title', 'Golem Documentation'),
+                "metadata": metadata,
+            })
+    return chunks
+
+def diff_chunks(chunks, existing_ids):
+    """Compare freshly built chunks with the ids already in the collection.
+    Returns (new_chunks, stale_ids): chunks whose id is not stored yet, and
+    stored ids that no longer correspond to any chunk.
+    """
+    wanted_ids = {chunk['id'] for chunk in chunks}
+    new_chunks = [chunk for chunk in chunks if chunk['id'] not in existing_ids]
+    stale_ids = set(existing_ids) - wanted_ids
+    return new_chunks, stale_ids
+
+def embedding_text(title, text):
+    """The content embedded for a chunk. The embedding config takes only one
+    title per call, so the page title travels inline and one call can mix pages."""
+    return f"title: {title} | text: {text}"
+
+def embed_batch(client, texts, title=None, task_type="RETRIEVAL_DOCUMENT"):
+    """Embed a list of texts with a single embed_content call"""
+    response = client.models.embed_content(
+        model=EMBEDDING_MODEL,
+        contents=texts,
+        config=EmbedContentConfig(
+            task_type=task_type,
+            output_dimensionality=EMBEDDING_DIMENSIONS,
+            title=title,
+        ),
+    )
+    return [embedding.values for embedding in response.embeddings]
+
+def make_batches(chunks, batch_size):
+    """Cut the chunks into full batches of `batch_size`, keeping each page's
+    chunks together in order. Returns (label, indexes) pairs for logging."""
+    by_title = {}
+    for index, chunk in enumerate(chunks):
+        by_title.setdefault(chunk['title'], []).append(index)
+    ordered = [index for indexes in by_title.values() for index in indexes]
+
+    batches = []
+    for start in range(0, len(ordered), batch_size):
+        indexes = ordered[start:start + batch_size]
+        titles = list(dict.fromkeys(chunks[i]['title'] for i in indexes))
+        label = titles[0] if len(titles) == 1 else f"{titles[0]} and {len(titles) - 1} more pages"
+        batches.append((label, indexes))
+    return batches
+
+def embed_chunks(client, chunks, batch_size=None, concurrency=None, on_batch=None):
+    """Embed chunks in multi-content batches with a bounded number in flight.
+
+    `chunks` is a list of dicts with at least 'text' and 'title' keys.
+    Returns (embeddings, stats) where embeddings[i] belongs to chunks[i] and
+    is None if its batch failed. When `on_batch` is given it is called with
+    (batch_chunks, vectors) as each batch completes and embeddings is None,
+    so vectors are never held for the whole corpus.
+    """
+    batch_size = min(batch_size or EMBED_BATCH_SIZE, MAX_BATCH_SIZE)
+    concurrency = max(1, concurrency or EMBED_CONCURRENCY)
+
+    batches = make_batches(chunks, batch_size)
+    embeddings = [None] * len(chunks) if on_batch is None else None
+    embedded = 0
+    failed_batches = 0
+    started = time.perf_counter()
+
+    def run_batch(label, indexes):
+        texts = [embedding_text(chunks[i]['title'], chunks[i]['text']) for i in indexes]
+        return embed_batch(client, texts)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # At most `concurrency` batches are in flight; the next one is submitted only
+        # when a finished batch has been consumed, so results never pile up
+        pending = iter(batches)
+        futures = {}
+
+        def submit_next():
+            for label, indexes in pending:
+                futures[executor.submit(run_batch, label, indexes)] = (label, indexes)
+                return
+
+        for _ in range(concurrency):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                label, indexes = futures.pop(future)
+                submit_next()
+                try:
+                    values = future.result()
+                except Exception as e:
+                    failed_batches += 1
+                    print(f"Error embedding batch of {len(indexes)} chunks - {label}: {str(e)}")
+                    continue
+
+                embedded += len(values)
+                if on_batch is not None:
+                    on_batch([chunks[i] for i in indexes], values)
+                else:
+                    for i, vector in zip(indexes, values):
+                        embeddings[i] = vector
+                print(f"Embedded batch of {len(indexes)} chunks - {label}")
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "chunks": len(chunks),
+        "embedded": embedded,
+        "batches": len(batches),
+        "failed_batches": failed_batches,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(embedded / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    print(f"Embedded {embedded}/{len(chunks)} chunks in {stats['seconds']}s "
+          f"({stats['chunks_per_second']} chunks/sec, {len(batches)} batches, concurrency {concurrency})")
+    return embeddings, stats
+
+class IngestCheckpoint:
+    """Append-only record of chunk ids already upserted by an interrupted run.
+    The first line names the collection the ids belong to, so a checkpoint
+    left over from a different (e.g. recreated) collection is ignored.
+    """
+
+    def __init__(self, path, collection_id):
+        self.path = path
+        self.header = f"# collection {collection_id}"
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return set()
+        with open(self.path, 'r', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        if not lines or lines[0] != self.header:
+            print(f"Ignoring checkpoint {self.path} from a different collection")
+            return set()
+        # A partially written last line never matches a real chunk id, so it is harmless
+        completed = set(line for line in lines[1:] if line)
+        print(f"Resuming from checkpoint {self.path}: {len(completed)} chunks already upserted")
+        return completed
+
+    def _has_header(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as file:
+            return file.readline().rstrip("\n") == self.header
+
+    def record(self, ids):
+        if not self.path:
+            return
+        # A checkpoint from another collection is replaced rather than appended to
+        fresh = not self._has_header()
+        with open(self.path, 'w' if fresh else 'a', encoding='utf-8') as file:
+            if fresh:
+                file.write(self.header + "\n")
+            file.write("".join(f"{chunk_id}\n" for chunk_id in ids))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+class StreamingUpserter:
+    """Buffers embedded chunks and upserts them to Chroma in fixed-size batches,
+    recording each successful batch in the checkpoint and the collection statistics.
+    """
+
+    def __init__(self, collection, batch_size=None, checkpoint=None, stats=None):
+        self.collection = collection
+        self.batch_size = batch_size or UPSERT_BATCH_SIZE
+        self.checkpoint = checkpoint
+        self.stats = stats
+        self.pending = []
+        self.upserted = 0
+        self.failed = 0
+        self.parent_ids = {}
+
+    def add_batch(self, chunks, embeddings):
+        for chunk, embedding in zip(chunks, embeddings):
+            self.pending.append((chunk, embedding))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        ids = [chunk['id'] for chunk, _ in batch]
+        metadatas = [chunk['metadata'] for chunk, _ in batch]
+        try:
+            self.collection.upsert(
+                ids=ids,
+                documents=[chunk['text'] for chunk, _ in batch],
+                embeddings=[embedding for _, embedding in batch],
+                metadatas=metadatas
+            )
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Error during upsert: {str(e)}")
+            for i in range(min(5, len(metadatas))):
+                print(f"Sample metadata {i}: {metadatas[i]}")
+            return
+
+        if self.checkpoint is not None:
+            self.checkpoint.record(ids)
+        self.upserted += len(batch)
+        if self.stats is not None:
+            for chunk, _ in batch:
+                self.stats.add(chunk['metadata'], chunk['text'])
+        for metadata in metadatas:
+            parent_id = metadata.get('id_parent', 'unknown')
+            self.parent_ids[parent_id] = self.parent_ids.get(parent_id, 0) + 1
+        print(f"Upserted {len(batch)} document chunks ({self.upserted} so far)")
+
+def print_collection_summary(collection, page_size=None):
+    """Print how many chunks each parent document has in the collection"""
+    try:
+        scan = CollectionScan(collection, include=['metadatas'], page_size=page_size, track_memory=True)
+        parent_ids = {}
+        for _, metadata, _ in scan.records():
+            parent_id = (metadata or {}).get('id_parent', 'unknown')
+            parent_ids[parent_id] = parent_ids.get(parent_id, 0) + 1
+        
+        if parent_ids:
+            print("\nSummary of Parent IDs in existing collection:")
+            for parent_id, count in parent_ids.items():
+                print(f"  Parent ID {parent_id}: {count} chunks")
+            print(f"Total unique parent IDs: {len(parent_ids)}")
+        print(scan.summary())
+    except Exception as e:
+        print(f"Error getting parent ID summary: {str(e)}")
+
+def write_keyword_index(chunks, path=KEYWORD_INDEX_PATH):
+    """Build the BM25 index the API fuses with vector search from the ingested chunks"""
+    started = time.perf_counter()
+    try:
+        index = BM25Index.build(chunks)
+        index.save(path)
+    except Exception as e:
+        print(f"Error writing keyword index {path}: {str(e)}")
+        return False
+    print(f"Keyword index written to {path}: {len(index.records)} chunks, {len(index.vocabulary)} terms "
+          f"in {time.perf_counter() - started:.2f}s")
+    return True
+
+def load_golem_docs_to_chroma(client, chroma_client, yaml_path, collection_name=COLLECTION_NAME,
+                              keyword_index_path=None, corpus_key="golem"):
+    """Bring the Chroma collection in line with one corpus of a YAML or CSV file.
+    Returns True when the collection fully matches the corpus afterwards.
+    """
+    # Load the corpus file (YAML through the compiled snapshot when it is current)
+    data = load_corpus_file(yaml_path)
+    
+    collection = chroma_client.get_or_create_collection(name=collection_name, metadata={"hnsw:space": "cosine"})
+    
+    chunks = build_chunks(data, corpus_key)
+    
+    # The keyword index is rebuilt from the same chunks on every sync
+    write_keyword_index(chunks, keyword_index_path or keyword_index_path_for(collection_name))
+    
+    # Chunk ids are derived from their content, so only new or changed chunks need embedding
+    existing_ids = set(scan_ids(collection))
+    
+    # Chunks upserted by an interrupted run are skipped as well
+    checkpoint = IngestCheckpoint(checkpoint_path_for(collection_name), collection.id)
+    existing_ids |= checkpoint.load()
+    new_chunks, stale_ids = diff_chunks(chunks, existing_ids)
+    
+    # Statistics served by /chromadb-stats, kept in step with every delete and upsert
+    stats = current_stats(chroma_client, collection, collection_name)
+    
+    if not new_chunks and not stale_ids:
+        print(f"ChromaDB collection already up to date with {collection.count()} documents")
+        print_collection_summary(collection)
+        checkpoint.clear()
+        return True
+    
+    unchanged = len(chunks) - len(new_chunks)
+    print(f"Syncing Golem documentation: {len(new_chunks)} new or changed chunks, "
+          f"{len(stale_ids)} removed, {unchanged} unchanged")
+    
+    if new_chunks:
+        # Embed new chunks in concurrent batches and upsert them as they arrive
+        upserter = StreamingUpserter(collection, checkpoint=checkpoint, stats=stats)
+        try:
+            _, embed_stats = embed_chunks(client, new_chunks, on_batch=upserter.add_batch)
+            upserter.flush()
+        finally:
+            save_stats(chroma_client, collection_name, stats)
+        print(f"Loaded {upserter.upserted} document chunks into ChromaDB")
+        
+        # Print summary of parent IDs processed
+        print("\nSummary of Parent IDs processed:")
+        for parent_id, count in upserter.parent_ids.items():
+            print(f"  Parent ID {parent_id}: {count} chunks")
+        print(f"Total unique parent IDs: {len(upserter.parent_ids)}")
+        
+        if upserter.failed or embed_stats['failed_batches']:
+            print(f"Sync incomplete, keeping checkpoint {checkpoint.path} for the next run")
+            return False
+    
+    # Delete chunks whose content changed or whose page vanished from the YAML, only once
+    # their replacements are stored so changed pages never drop out of the live collection
+    if stale_ids:
+        try:
+            stale = collection.get(ids=sorted(stale_ids), include=['metadatas', 'documents'])
+            collection.delete(ids=sorted(stale_ids))
+            print(f"Deleted {len(stale_ids)} stale document chunks from ChromaDB")
+        except Exception as e:
+            print(f"Error deleting stale chunks: {str(e)}")
+            return False
+        for metadata, document in zip(stale['metadatas'], stale['documents']):
+            stats.remove(metadata, document)
+        save_stats(chroma_client, collection_name, stats)
+    
+    # Everything is in the collection, so the checkpoint is no longer needed
+    checkpoint.clear()
+    return True
+
+def verify_collection(chroma_client, yaml_path, collection_name=COLLECTION_NAME, corpus_key="golem"):
+    """Compare the stored chunk ids with the ones the YAML corpus produces"""
+    chunks = build_chunks(load_corpus_file(yaml_path), corpus_key)
+
+    collection = chroma_client.get_collection(collection_name)
+    stored_ids = set(scan_ids(collection))
+    missing, stale_ids = diff_chunks(chunks, stored_ids)
+    return {
+        "collection": collection_name,
+        "expected_chunks": len(chunks),
+        "stored_chunks": len(stored_ids),
+        "missing_chunks": len(missing),
+        "stale_chunks": len(stale_ids),
+        "in_sync": not missing and not stale_ids
+    }
+
+if __name__ == "__main__":
+    # Compare one-call-per-chunk against the batched pipeline using the fake client
+    import sys
+    from fakes import FakeGenaiClient
+
+    yaml_path = sys.argv[1] if len(sys.argv) > 1 else "golem_docs.yaml"
+    chunks = build_chunks(load_corpus(yaml_path))
+
+    fake = FakeGenaiClient()
+    print(f"\nSequential baseline ({len(chunks)} chunks):")
+    _, sequential = embed_chunks(fake, chunks, batch_size=1, concurrency=1)
+    print("\nBatched pipeline:")
+    _, batched = embed_chunks(fake, chunks)
+    print(f"\nSpeedup: {sequential['seconds'] / batched['seconds']:.1f}x")
@@ -0,0 +1,62 @@
+"""Load-test harness for the request path against stubbed backends.
+
+Runs the /rawquery-cli flow (embed, vector search, summarize) for N
+concurrent requests in one event loop, first calling the synchronous
+clients directly the way the handlers used to, then through SearchService.
+
+    python loadtest.py --requests 50 --embed-latency 0.1 --chroma-latency 0.05 --generate-latency 0.5
+"""
+import time
+import asyncio
+import argparse
+from services import SearchService, build_summary_prompt, format_query_results
+from vector_store import ChromaVectorStore
+from fakes import FakeGenaiClient, FakeChromaClient
+
+async def blocking_request(client, chroma_client, query, n_results):
+    """The old handler body: synchronous calls made straight from a coroutine"""
+    embedding = client.models.embed_content(model=None, contents=query).embeddings[0].values
+    results = chroma_client.get_collection("golem_docs_v1").query(
+        query_embeddings=[embedding], n_results=n_results
+    )
+    formatted_results = format_query_results(results)
+    summary = client.models.generate_content(model=None, contents=build_summary_prompt(query, formatted_results))
+    return summary.text
+
+async def service_request(service, query, n_results):
+    formatted_results = await service.search(query, n_results)
+    return await service.summarize(query, formatted_results)
+
+async def run(label, make_request, total):
+    started = time.perf_counter()
+    await asyncio.gather(*(make_request(f"query {i}") for i in range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/sec)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency load test against stubbed backends")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--n-results", type=int, default=10)
+    parser.add_argument("--embed-latency", type=float, default=0.1)
+    parser.add_argument("--chroma-latency", type=float, default=0.05)
+    parser.add_argument("--generate-latency", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=None, help="Chroma thread pool size")
+    args = parser.parse_args()
+
+    client = FakeGenaiClient(args.embed_latency, args.generate_latency, dimensions=8)
+    chroma_client = FakeChromaClient(args.chroma_latency)
+    service = SearchService(client, {"golem": ChromaVectorStore(chroma_client)}, max_workers=args.workers)
+
+    async def benchmark():
+        blocking = await run("blocking", lambda q: blocking_request(client, chroma_client, q, args.n_results), args.requests)
+        async_ = await run("async", lambda q: service_request(service, q, args.n_results), args.requests)
+        print(f"Concurrency gain: {blocking / async_:.1f}x")
+
+    try:
+        asyncio.run(benchmark())
+    finally:
+        service.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,21 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, conint
+from typing import List, Optional, Union
 import chromadb
 from google import genai
 import os
-import yaml
-import uuid
+import json
 from dotenv import load_dotenv
-from fastapi.responses import JSONResponse
-from google.genai.types import EmbedContentConfig
+from fastapi.responses import JSONResponse, StreamingResponse
+from services import SearchService
+from corpora import CORPORA, TECH_STACKS, collection_for
+from vector_store import create_vector_store, VECTOR_STORE
+from cache import EmbeddingCache, SemanticResponseCache
+from collection_stats import current_stats
+from filters import make_filter, filter_key
+from rerank import create_reranker, RERANK
+from retrieval import load_keyword_index, keyword_index_path_for, HYBRID_SEARCH
 
 app = FastAPI(
     title="Golem Documentation Search",
@@ -28,16 +35,71 @@ CHROMA_SERVER_HOST = os.getenv("CHROMA_SERVER_HOST")
 
 client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
 
-chroma_client = chromadb.HttpClient(
-    host=CHROMA_SERVER_HOST, 
-    port=8000
-)
+# The local vector store searches an exported index in-process and needs no Chroma server
+chroma_client = None
+if VECTOR_STORE == "chroma":
+    chroma_client = chromadb.HttpClient(
+        host=CHROMA_SERVER_HOST, 
+        port=8000
+    )
 
 # chroma_client = chromadb.PersistentClient(path="golem_chroma_db")
 
+unknown_stacks = [stack for stack in TECH_STACKS if stack not in CORPORA]
+if unknown_stacks:
+    raise ValueError(f"Unknown TECH_STACKS {', '.join(unknown_stacks)}, expected some of {', '.join(CORPORA)}")
+
+# One collection per tech stack
+vector_stores = {stack: create_vector_store(chroma_client, collection_for(stack)) for stack in TECH_STACKS}
+
+# BM25 indexes written by doc0-index, fused with vector search for exact identifier matches
+keyword_indexes = {}
+if HYBRID_SEARCH:
+    for stack in TECH_STACKS:
+        keyword_index = load_keyword_index(keyword_index_path_for(collection_for(stack)))
+        if keyword_index is not None:
+            keyword_indexes[stack] = keyword_index
+
+# Async access to Gemini and the vector stores for the request handlers
+search_service = SearchService(
+    client,
+    vector_stores,
+    embedding_cache=EmbeddingCache(),
+    keyword_indexes=keyword_indexes,
+    reranker=create_reranker()
+)
+
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "1000"))
+# Largest n_results a request may ask for
+MAX_N_RESULTS = int(os.getenv("MAX_N_RESULTS", "100"))
+
+# Stored summaries reused for near-duplicate questions
+response_cache = SemanticResponseCache()
+
+class SearchFilter(BaseModel):
+    # Only search chunks from these sections, pages under this URL prefix, or these parent documents
+    section: Optional[Union[str, List[str]]] = None
+    url_prefix: Optional[str] = None
+    id_parent: Optional[Union[int, str, List[Union[int, str]]]] = None
+
 class QueryRequest(BaseModel):
     query: str
-    n_results: int = 10  # Default value of 10 if not specified
+    n_results: conint(ge=1, le=MAX_N_RESULTS) = 10  # Default value of 10 if not specified
+    # A tech stack name or list of names; all served stacks when omitted
+    tech_stack: Optional[Union[str, List[str]]] = None
+    where: Optional[SearchFilter] = None
+    # Over-fetch and re-rank candidates (RERANK sets the default), within this many milliseconds
+    rerank: Optional[bool] = None
+    rerank_budget_ms: Optional[float] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    n_results: conint(ge=1, le=MAX_N_RESULTS) = 10
+    tech_stack: Optional[Union[str, List[str]]] = None
+    where: Optional[SearchFilter] = None
+    # Over-fetch and re-rank candidates (RERANK sets the default), within this many milliseconds
+    rerank: Optional[bool] = None
+    rerank_budget_ms: Optional[float] = None
 
 class EmbeddingRequest(BaseModel):
     text: str
@@ -47,186 +109,84 @@ class TestGeminiRequest(BaseModel):
 
 class EnhanceQueryCLIRequest(BaseModel):
     query: str
-    n_results: int = 10
+    n_results: conint(ge=1, le=MAX_N_RESULTS) = 10
+    # Search the raw query while the rewrite is in flight and fuse both result lists
+    speculative: bool = False
+    # Skip the rewrite when the best raw result scores at least this well (speculative mode only)
+    skip_enhance_threshold: Optional[float] = None
+    tech_stack: Optional[Union[str, List[str]]] = None
+    where: Optional[SearchFilter] = None
+    # Over-fetch and re-rank candidates (RERANK sets the default), within this many milliseconds
+    rerank: Optional[bool] = None
+    rerank_budget_ms: Optional[float] = None
 
 class RawQueryCLIRequest(BaseModel):
     query: str
-    n_results: int = 10
-
-def get_embedding(text: str, title="Golem Documentation"):
-    response = client.models.embed_content(
-        model="models/text-embedding-004",
-        contents=text,
-        config=EmbedContentConfig(
-            task_type="RETRIEVAL_DOCUMENT",
-            output_dimensionality=768,
-            title=title,
-        ),
-    )
-    # Return the embedding values from the first content
-    return response.embeddings[0].values
-
-def split_content_by_tokens(content, max_tokens=2000, chars_per_token=4):
-    """Fast and reliable content chunking by character count.
-    Converts newlines to spaces and normalizes spacing for consistent processing.
-    """
-    # Normalize newlines to spaces and remove multiple spaces
-    normalized_content = content.replace('\n', ' ').replace('\r', ' ')
-    normalized_content = ' '.join(normalized_content.split())
-    
-    max_chars = max_tokens * chars_per_token
-    
-    # Quick return if content fits in one chunk
-    if len(normalized_content) <= max_chars:
-        return [normalized_content]
-    
-    chunks = []
-    start = 0
-    
-    while start < len(normalized_content):
-        # Determine end position of this chunk
-        end = min(start + max_chars, len(normalized_content))
-        
-        # If we're not at the end of the content, find last space
-        if end < len(normalized_content):
-            # Look for the last space within the chunk
-            last_space = normalized_content.rfind(' ', start, end)
-            
-            if last_space != -1:  # If we found a space
-                end = last_space  # Cut at the space
-            # If no space found (very rare for large chunks), we'd cut at max_chars
-        
-        # Add the chunk and move to next position
-        chunks.append(normalized_content[start:end])
-        start = end + 1  # Skip the space
-    
-    return chunks
+    n_results: conint(ge=1, le=MAX_N_RESULTS) = 10
+    tech_stack: Optional[Union[str, List[str]]] = None
+    where: Optional[SearchFilter] = None
+    # Over-fetch and re-rank candidates (RERANK sets the default), within this many milliseconds
+    rerank: Optional[bool] = None
+    rerank_budget_ms: Optional[float] = None
 
-def load_golem_docs_to_chroma(yaml_path: str):
-    # Load YAML file
-    with open(yaml_path, 'r', encoding='utf-8') as file:
-        data = yaml.safe_load(file)
-    
-    collection = chroma_client.get_or_create_collection(name="golem_docs_v1", metadata={"hnsw:space": "cosine"})
-    
-    # Check if collection is empty
-    if collection.count() == 0:
-        print("ChromaDB collection is empty. Loading Golem documentation...")
-        documents = []
-        embeddings = []
-        metadatas = []
-        ids_list = []
-        
-        for doc in data.get('golem', []):
-            content = doc.get('content', '').strip()
-            
-            if content:
-                # Split content if it exceeds token limit
-                content_chunks = split_content_by_tokens(content)
-                
-                for i, chunk in enumerate(content_chunks):
-                    try:
-                        # Create metadata directly from the YAML entry, excluding content
-                        metadata = {k: str(v) for k, v in doc.items() if k != 'content'}
-                        
-                        # Add only chunk index information
-                        metadata['chunk_index'] = str(i)
-                        metadata['total_chunks'] = str(len(content_chunks))
-                        
-                        # Extract id_parent for logging
-                        id_parent = doc.get('id_parent', 'unknown')
-                        
-                        # Pass the title for embedding context
-                        embedding = get_embedding(chunk, title=doc.get('title', 'Golem Documentation'))
-                        documents.append(chunk)
-                        embeddings.append(embedding)
-                        metadatas.append(metadata)
-                        ids_list.append(str(uuid.uuid4()))
-                        
-                        # Print with id_parent for tracking
-                        print(f"Processed document: ID {id_parent} - {doc.get('title', 'Untitled')} (chunk {i+1}/{len(content_chunks)})")
-                    except Exception as e:
-                        id_parent = doc.get('id_parent', 'unknown')
-                        print(f"Error processing document chunk {i+1} from ID {id_parent} - {doc.get('title', '')}: {str(e)}")
-        
+def check_collection_ready():
+    """Cheap readiness check against the pre-built collection of every served stack"""
+    stacks = {}
+    for stack, store in vector_stores.items():
+        collection_name = collection_for(stack)
         try:
-            collection.upsert(
-                ids=ids_list,
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas
-            )
-            print(f"Loaded {len(documents)} document chunks into ChromaDB")
-            
-            # Print summary of parent IDs processed
-            parent_ids = {}
-            for metadata in metadatas:
-                parent_id = metadata.get('id_parent', 'unknown')
-                parent_ids[parent_id] = parent_ids.get(parent_id, 0) + 1
-            
-            print("\nSummary of Parent IDs processed:")
-            for parent_id, count in parent_ids.items():
-                print(f"  Parent ID {parent_id}: {count} chunks")
-            print(f"Total unique parent IDs: {len(parent_ids)}")
-            
+            count = store.count()
         except Exception as e:
-            print(f"Error during upsert: {str(e)}")
-            for i in range(min(5, len(metadatas))):
-                print(f"Sample metadata {i}: {metadatas[i]}")
-    else:
-        print(f"ChromaDB collection already contains {collection.count()} documents")
-        
-        # Print summary of parent IDs in the existing collection
-        try:
-            results = collection.get(include=['metadatas'])
-            if results and 'metadatas' in results and results['metadatas']:
-                parent_ids = {}
-                for metadata in results['metadatas']:
-                    parent_id = metadata.get('id_parent', 'unknown')
-                    parent_ids[parent_id] = parent_ids.get(parent_id, 0) + 1
-                
-                print("\nSummary of Parent IDs in existing collection:")
-                for parent_id, count in parent_ids.items():
-                    print(f"  Parent ID {parent_id}: {count} chunks")
-                print(f"Total unique parent IDs: {len(parent_ids)}")
-        except Exception as e:
-            print(f"Error getting parent ID summary: {str(e)}")
+            return {"ready": False, "message": f"Collection {collection_name} not available: {str(e)}"}
+        if count == 0:
+            return {"ready": False, "message": f"Collection {collection_name} is empty"}
+        stacks[stack] = {"collection": collection_name, "document_count": count, "hybrid_search": stack in keyword_indexes}
+    return {"ready": True, "vector_store": VECTOR_STORE, "document_count": sum(s["document_count"] for s in stacks.values()),
+            "tech_stacks": stacks}
+
+def require_chroma():
+    if chroma_client is None:
+        raise HTTPException(status_code=503, detail=f"ChromaDB is not configured (VECTOR_STORE={VECTOR_STORE})")
+
+def wants_rerank(request):
+    return RERANK if request.rerank is None else request.rerank
+
+def resolve_filter(where):
+    if where is None:
+        return None
+    return make_filter(where.section, where.url_prefix, where.id_parent)
+
+def resolve_tech_stacks(tech_stack):
+    try:
+        return search_service.resolve_stacks(tech_stack)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.on_event("startup")
 async def startup_db_client():
-    try:
-        yaml_path = "golem_docs.yaml"
-        if os.path.exists(yaml_path):
-            load_golem_docs_to_chroma(yaml_path)
-        else:
-            print(f"Warning: YAML file {yaml_path} not found")
-    except Exception as e:
-        print(f"Error initializing ChromaDB: {str(e)}")
+    # The index is built offline with `python doc0_index.py build`
+    status = await search_service.run_in_pool(check_collection_ready)
+    if status["ready"]:
+        for stack, info in status["tech_stacks"].items():
+            print(f"Collection {info['collection']} ({stack}) ready in the {VECTOR_STORE} vector store with {info['document_count']} documents")
+    else:
+        print(f"Warning: {status['message']}. Run `python doc0_index.py build` to create it")
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    search_service.shutdown()
 
 @app.post("/query")
 async def query_docs(request: QueryRequest):
+    stacks = resolve_tech_stacks(request.tech_stack)
+    search_filter = resolve_filter(request.where)
+    rerank = wants_rerank(request)
     try:
-        query_embedding = get_embedding(request.query)
-        collection = chroma_client.get_collection("golem_docs_v1")
-        
-        # Execute the query without any filters
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=request.n_results,
-            include=['documents', 'metadatas', 'distances']
+        # The optional filter narrows the candidates inside the vector search
+        formatted_results = await search_service.search(
+            request.query, request.n_results, stacks, search_filter, rerank, request.rerank_budget_ms
         )
         
-        # Format results
-        formatted_results = []
-        if results['documents'] and results['documents'][0]:
-            for i in range(len(results['documents'][0])):
-                result = {
-                    'document': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i],
-                    'similarity_score': 1 - results['distances'][0][i]
-                }
-                formatted_results.append(result)
-        
         return {
             "results": formatted_results
         }
@@ -235,10 +195,36 @@ async def query_docs(request: QueryRequest):
         print(f"Error in query: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/batch")
+async def query_docs_batch(request: BatchQueryRequest):
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="queries must not be empty")
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+    stacks = resolve_tech_stacks(request.tech_stack)
+    search_filter = resolve_filter(request.where)
+    rerank = wants_rerank(request)
+    try:
+        # Embed all queries together and search them in one vector store call per stack
+        batch_results = await search_service.search_many(
+            request.queries, request.n_results, stacks, search_filter, rerank, request.rerank_budget_ms
+        )
+        
+        return {
+            "results": [
+                {"query": query, "results": formatted_results}
+                for query, formatted_results in zip(request.queries, batch_results)
+            ]
+        }
+    
+    except Exception as e:
+        print(f"Error in batch query: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/test")
 async def test_embedding(request: EmbeddingRequest):
     try:
-        embedding = get_embedding(request.text)
+        embedding = await search_service.embed(request.text)
         return {"embedding": embedding}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -247,121 +233,52 @@ async def test_embedding(request: EmbeddingRequest):
 async def test_gemini_flash(request: TestGeminiRequest):
     try:
         # Generate content using gemini-2.0-flash model
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=request.prompt
-        )
+        response_text = await search_service.generate(request.prompt)
         
         # Return the generated content
-        return {"response": response.text}
+        return {"response": response_text}
     
     except Exception as e:
         print(f"Error in test gemini flash: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/ready")
+async def readiness():
+    status = await search_service.run_in_pool(check_collection_ready)
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
 @app.get("/")
 async def root():
     return {"message": "Golem Documentation Search API - Use /docs to see the API documentation"}
 
+@app.get("/cache-stats")
+async def get_cache_stats():
+    return {
+        "embedding_cache": search_service.embedding_cache.stats(),
+        "response_cache": response_cache.stats()
+    }
+
 @app.get("/chromadb-stats")
-async def get_chromadb_stats():
+def get_chromadb_stats(tech_stack: Optional[str] = None):
+    require_chroma()
+    collection_name = collection_for(resolve_tech_stacks(tech_stack or TECH_STACKS[0])[0])
     try:
-        collection = chroma_client.get_collection("golem_docs_v1")
-        
-        # Get total count
-        total_count = collection.count()
-        
-        # Get all metadata for analysis
-        results = collection.get(include=['metadatas'])
-        
-        # Track various statistics
-        titles = {}    # Count documents per title
-        url_domains = {}  # Track documentation domains
-        content_stats = {
-            "total_chunks": total_count,
-            "avg_chunk_size": 0,
-            "max_chunk_size": 0,
-            "multi_chunk_docs": 0
-        }
-        
-        total_chars = 0
-        max_chunk_index = -1
-        doc_chunk_counts = {}  # Track how many chunks each document has
-        
-        if results and 'metadatas' in results and results['metadatas']:
-            for metadata in results['metadatas']:
-                if not metadata:
-                    continue
-                
-                # Track titles
-                title = metadata.get('title', 'untitled')
-                titles[title] = titles.get(title, 0) + 1
-                
-                # Track URL domains
-                url = metadata.get('url', '')
-                if url:
-                    domain = url.split('//')[1].split('/')[0] if '//' in url else url.split('/')[0]
-                    url_domains[domain] = url_domains.get(domain, 0) + 1
-                
-                # Track document chunks
-                doc_id = metadata.get('id_parent', '')
-                chunk_index = int(metadata.get('chunk_index', 0))
-                total_chunks = int(metadata.get('total_chunks', 1))
-                
-                # Update document chunk tracking
-                if doc_id not in doc_chunk_counts:
-                    doc_chunk_counts[doc_id] = total_chunks
-                
-                # Track largest chunk index
-                if chunk_index > max_chunk_index:
-                    max_chunk_index = chunk_index
-                
-                # Track character counts if available
-                if 'char_count' in metadata:
-                    try:
-                        char_count = int(metadata['char_count'])
-                        total_chars += char_count
-                        if char_count > content_stats["max_chunk_size"]:
-                            content_stats["max_chunk_size"] = char_count
-                    except (ValueError, TypeError):
-                        pass
-        
-        # Calculate additional statistics
-        multi_chunk_docs = sum(1 for count in doc_chunk_counts.values() if count > 1)
-        content_stats["multi_chunk_docs"] = multi_chunk_docs
-        
-        if total_count > 0:
-            content_stats["avg_chunk_size"] = total_chars / total_count if total_chars > 0 else "Unknown"
-        
-        # Sort titles by frequency (most common first)
-        sorted_titles = sorted(titles.items(), key=lambda x: x[1], reverse=True)
-        
-        # Get the top 10 most common titles
-        top_titles = sorted_titles[:10]
-        
-        return {
-            "collection_info": {
-                "name": "golem_docs_v1",
-                "total_records": total_count,
-                "unique_documents": len(doc_chunk_counts),
-                "multi_chunk_documents": multi_chunk_docs,
-                "max_chunks_per_document": max(doc_chunk_counts.values()) if doc_chunk_counts else 0
-            },
-            "content_statistics": content_stats,
-            "document_titles": {
-                "unique_titles": len(titles),
-                "top_titles": dict(top_titles)
-            },
-            "url_domains": url_domains
-        }
+        collection = chroma_client.get_collection(collection_name)
+        # Maintained by ingestion; only recomputed when missing or out of step with the collection
+        stats = current_stats(chroma_client, collection, collection_name)
+        return stats.report(collection_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
 @app.get("/inspect")
-async def inspect_database():
+def inspect_database(tech_stack: Optional[str] = None):
+    require_chroma()
+    collection_name = collection_for(resolve_tech_stacks(tech_stack or TECH_STACKS[0])[0])
     try:
-        collection = chroma_client.get_collection("golem_docs_v1")
+        collection = chroma_client.get_collection(collection_name)
         count = collection.count()
         
         if count == 0:
@@ -391,51 +308,86 @@ async def inspect_database():
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+async def lookup_cached_response(cache_namespace, query, stacks):
+    """Return (query_embedding, versions, cached_response) for a summarization request"""
+    query_embedding = await search_service.embed(query)
+    versions = await search_service.collection_versions(stacks)
+    return query_embedding, versions, response_cache.lookup(cache_namespace, query_embedding, versions)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_summary(request, formatted_results, response, cache_namespace, query_embedding, versions):
+    """Yield summary tokens as SSE events and cache the full response once complete"""
+    if not formatted_results:
+        response["summary"] = "No results found for your query."
+        yield sse_event("summary", {"text": response["summary"]})
+        yield sse_event("done", {})
+        return
+
+    summary_parts = []
+    async for text in search_service.summarize_stream(request.query, formatted_results):
+        summary_parts.append(text)
+        yield sse_event("summary", {"text": text})
+
+    response["summary"] = "".join(summary_parts)
+    response_cache.store(cache_namespace, query_embedding, versions, response)
+    yield sse_event("done", {})
+
+def stream_cached_response(cached_response):
+    """Replay a cached response as the same sequence of SSE events"""
+    async def events():
+        first = {key: value for key, value in cached_response.items() if key != "summary"}
+        yield sse_event("results", first)
+        yield sse_event("summary", {"text": cached_response["summary"]})
+        yield sse_event("done", {})
+    return events()
+
+def sse_response(events, error_label):
+    async def guarded():
+        try:
+            async for event in events:
+                yield event
+        except Exception as e:
+            print(f"Error in {error_label}: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+    return StreamingResponse(
+        guarded(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def enhanced_search(request, stacks, search_filter=None, rerank=False):
+    """Rewrite-then-search, or the speculative variant when the request asks for it"""
+    if request.speculative:
+        enhanced_query, formatted_results, skipped = await search_service.speculative_search(
+            request.query, request.n_results, request.skip_enhance_threshold, stacks, search_filter,
+            rerank, request.rerank_budget_ms
+        )
+        if skipped:
+            print(f"Raw results scored above threshold, skipped query enhancement for: {request.query}")
+        return enhanced_query, formatted_results
+
+    enhanced_query = await search_service.enhance_query(request.query)
+    formatted_results = await search_service.search(
+        enhanced_query, request.n_results, stacks, search_filter, rerank, request.rerank_budget_ms
+    )
+    return enhanced_query, formatted_results
+
 @app.post("/enhance-query-cli")
 async def enhance_query_cli(request: EnhanceQueryCLIRequest):
+    stacks = resolve_tech_stacks(request.tech_stack)
+    search_filter = resolve_filter(request.where)
+    rerank = wants_rerank(request)
     try:
-        # Step 1: Enhance the query for better vector search
-        enhanced_query_response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=f"""
-            You are a search query enhancer for Golem documentation search system.
-            Your task is to improve the user's search query to make it more effective for semantic search in a vector database.
-            
-            Original query: "{request.query}"
-            
-            Enhance this query by:
-            1. Expanding the user query to make it more accurate in vector database search
-            2. Expanding abbreviations like 'CLI' to 'Command Line Interface'
-            3. Including synonyms for technical terms
-            4. Improving specificity while maintaining the original intent
-            
-            Return ONLY the enhanced query text with no explanations or additional text.
-            """
-        )
-        
-        enhanced_query = enhanced_query_response.text.strip()
+        # Return a stored answer if a near-identical question was already summarized
+        cache_namespace = f"enhance-query-cli:{request.n_results}:{request.speculative}:{','.join(stacks)}:{filter_key(search_filter)}:{rerank}"
+        query_embedding, versions, cached_response = await lookup_cached_response(cache_namespace, request.query, stacks)
+        if cached_response is not None:
+            return cached_response
         
-        # Step 2: Query the vector database with the enhanced query
-        query_embedding = get_embedding(enhanced_query)
-        collection = chroma_client.get_collection("golem_docs_v1")
-        
-        # Execute the query without filters
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=request.n_results,
-            include=['documents', 'metadatas', 'distances']
-        )
-        
-        # Format results
-        formatted_results = []
-        if results['documents'] and results['documents'][0]:
-            for i in range(len(results['documents'][0])):
-                result = {
-                    'document': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i],
-                    'similarity_score': 1 - results['distances'][0][i]
-                }
-                formatted_results.append(result)
+        # Steps 1 and 2: Enhance the query for better vector search, then query the vector database
+        enhanced_query, formatted_results = await enhanced_search(request, stacks, search_filter, rerank)
         
         # If no results found, return early
         if not formatted_results:
@@ -444,45 +396,18 @@ async def enhance_query_cli(request: EnhanceQueryCLIRequest):
                 "summary": "No results found for your query.",
                 "results": []
             }
-            
-        # Step 3: Format the results into a structured text for Gemini
-        formatted_content = ""
-        for index, result in enumerate(formatted_results):
-            formatted_content += f"""
-Document {index + 1}: {result['metadata']['title']}
-Content: {result['document']}
-URL: {result['metadata']['url']}
-Similarity Score: {(result['similarity_score'] * 100):.1f}%
-"""
         
-        # Step 4: Use Gemini to summarize the results based on the original query
-        summary_response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=f"""
-You are a technical documentation assistant for Golem. Your task is to answer the user's question using the provided documentation snippets.
-
-Follow these guidelines when creating your response:
-1. Answer the question clearly and concisely based on the documentation provided
-2. Maintain technical accuracy and use Golem terminology correctly
-3. Format your response with proper markdown for readability
-4. When referencing specific parts of the documentation, use citations like [1], [2], etc.
-5. For code examples or commands, use proper markdown code blocks with appropriate syntax highlighting
-6. At the end of your response, include a "References" section with numbered links to the source documentation
-7. IMPORTANT: In the References section, ensure each unique URL appears only once. Do not duplicate URLs.
-
-User question: {request.query}
-
-Here are the documentation snippets:
-{formatted_content}
-"""
-        )
+        # Step 3: Use Gemini to summarize the results based on the original query
+        summary = await search_service.summarize(request.query, formatted_results)
         
         # Return the enhanced query, Gemini-generated summary, and the raw search results
-        return {
+        response = {
             "enhanced_query": enhanced_query,
-            "summary": summary_response.text,
+            "summary": summary,
             "results": formatted_results
         }
+        response_cache.store(cache_namespace, query_embedding, versions, response)
+        return response
     
     except Exception as e:
         print(f"Error in enhance query CLI: {str(e)}")
@@ -490,78 +415,99 @@ Here are the documentation snippets:
 
 @app.post("/rawquery-cli")
 async def raw_query_cli(request: RawQueryCLIRequest):
+    stacks = resolve_tech_stacks(request.tech_stack)
+    search_filter = resolve_filter(request.where)
+    rerank = wants_rerank(request)
     try:
-        # Use the raw query directly for vector search (no enhancement)
-        query_embedding = get_embedding(request.query)
-        collection = chroma_client.get_collection("golem_docs_v1")
+        # Return a stored answer if a near-identical question was already summarized
+        cache_namespace = f"rawquery-cli:{request.n_results}:{','.join(stacks)}:{filter_key(search_filter)}:{rerank}"
+        query_embedding, versions, cached_response = await lookup_cached_response(cache_namespace, request.query, stacks)
+        if cached_response is not None:
+            return cached_response
         
-        # Execute the query without filters
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=request.n_results,
-            include=['documents', 'metadatas', 'distances']
+        # Use the raw query directly for vector search (no enhancement)
+        formatted_results = await search_service.search(
+            request.query, request.n_results, stacks, search_filter, rerank, request.rerank_budget_ms
         )
         
-        # Format results
-        formatted_results = []
-        if results['documents'] and results['documents'][0]:
-            for i in range(len(results['documents'][0])):
-                result = {
-                    'document': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i],
-                    'similarity_score': 1 - results['distances'][0][i]
-                }
-                formatted_results.append(result)
-        
         # If no results found, return early
         if not formatted_results:
             return {
                 "summary": "No results found for your query.",
                 "results": []
             }
-            
-        # Format the results into a structured text for Gemini
-        formatted_content = ""
-        for index, result in enumerate(formatted_results):
-            formatted_content += f"""
-Document {index + 1}: {result['metadata']['title']}
-Content: {result['document']}
-URL: {result['metadata']['url']}
-Similarity Score: {(result['similarity_score'] * 100):.1f}%
-"""
         
         # Use Gemini to summarize the results based on the original query
-        summary_response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=f"""
-You are a technical documentation assistant for Golem. Your task is to answer the user's question using the provided documentation snippets.
-
-Follow these guidelines when creating your response:
-1. Answer the question clearly and concisely based on the documentation provided
-2. Maintain technical accuracy and use Golem terminology correctly
-3. Format your response with proper markdown for readability
-4. When referencing specific parts of the documentation, use citations like [1], [2], etc.
-5. For code examples or commands, use proper markdown code blocks with appropriate syntax highlighting
-6. At the end of your response, include a "References" section with numbered links to the source documentation
-7. IMPORTANT: In the References section, ensure each unique URL appears only once. Do not duplicate URLs.
-
-User question: {request.query}
-
-Here are the documentation snippets:
-{formatted_content}
-"""
-        )
+        summary = await search_service.summarize(request.query, formatted_results)
         
         # Return the Gemini-generated summary and the raw search results
-        return {
-            "summary": summary_response.text,
+        response = {
+            "summary": summary,
             "results": formatted_results
         }
+        response_cache.store(cache_namespace, query_embedding, versions, response)
+        return response
     
     except Exception as e:
         print(f"Error in raw query CLI: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/enhance-query-cli/stream")
+async def enhance_query_cli_stream(request: EnhanceQueryCLIRequest):
+    """Server-Sent Events variant of /enhance-query-cli.
+    Emits a `results` event with the enhanced query and search results, then
+    `summary` events carrying summary text as it is generated, then `done`.
+    """
+    stacks = resolve_tech_stacks(request.tech_stack)
+    search_filter = resolve_filter(request.where)
+    rerank = wants_rerank(request)
+
+    async def events():
+        cache_namespace = f"enhance-query-cli:{request.n_results}:{request.speculative}:{','.join(stacks)}:{filter_key(search_filter)}:{rerank}"
+        query_embedding, versions, cached_response = await lookup_cached_response(cache_namespace, request.query, stacks)
+        if cached_response is not None:
+            async for event in stream_cached_response(cached_response):
+                yield event
+            return
+
+        enhanced_query, formatted_results = await enhanced_search(request, stacks, search_filter, rerank)
+        response = {"enhanced_query": enhanced_query, "results": formatted_results}
+        yield sse_event("results", response)
+
+        async for event in stream_summary(request, formatted_results, response, cache_namespace, query_embedding, versions):
+            yield event
+
+    return sse_response(events(), "enhance query CLI stream")
+
+@app.post("/rawquery-cli/stream")
+async def raw_query_cli_stream(request: RawQueryCLIRequest):
+    """Server-Sent Events variant of /rawquery-cli.
+    Emits a `results` event with the search results, then `summary` events
+    carrying summary text as it is generated, then `done`.
+    """
+    stacks = resolve_tech_stacks(request.tech_stack)
+    search_filter = resolve_filter(request.where)
+    rerank = wants_rerank(request)
+
+    async def events():
+        cache_namespace = f"rawquery-cli:{request.n_results}:{','.join(stacks)}:{filter_key(search_filter)}:{rerank}"
+        query_embedding, versions, cached_response = await lookup_cached_response(cache_namespace, request.query, stacks)
+        if cached_response is not None:
+            async for event in stream_cached_response(cached_response):
+                yield event
+            return
+
+        formatted_results = await search_service.search(
+            request.query, request.n_results, stacks, search_filter, rerank, request.rerank_budget_ms
+        )
+        response = {"results": formatted_results}
+        yield sse_event("results", response)
+
+        async for event in stream_summary(request, formatted_results, response, cache_namespace, query_embedding, versions):
+            yield event
+
+    return sse_response(events(), "raw query CLI stream")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,111 @@
+import os
+import math
+import time
+from retrieval import tokenize, vector_similarity
+
+# Re-ranking is off unless RERANK=true or a request asks for it
+RERANK = os.getenv("RERANK", "false").lower() == "true"
+# Candidates fetched from the vector search before re-ranking down to n_results
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+# Re-ranking that takes longer than this falls back to the vector order
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "50"))
+# Optional sentence-transformers cross-encoder, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+RERANK_MODEL = os.getenv("RERANK_MODEL")
+# Threads re-ranking runs on, apart from the vector store pool
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", "2"))
+# Candidate pairs the cross-encoder scores between checks of the deadline
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+
+# How much of the final score comes from the vector similarity
+VECTOR_WEIGHT = 0.4
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "of", "on", "or", "that", "the", "this", "to", "what", "when",
+    "where", "which", "why", "with", "you", "your"
+}
+
+class LexicalReranker:
+    """Scores candidates by how much of the query they cover.
+
+    Each query term is weighted by how rare it is among the candidates, so a
+    chunk containing the one distinctive identifier beats chunks that only
+    share common words; adjacent query term pairs found together add a
+    phrase bonus. The lexical score is blended with the vector similarity.
+    """
+
+    name = "lexical"
+
+    def score(self, query, results, deadline=None):
+        terms = [token for token in tokenize(query) if token not in STOPWORDS]
+        if not terms:
+            return [vector_similarity(result) for result in results]
+        unique_terms = list(dict.fromkeys(terms))
+        bigrams = set(zip(terms, terms[1:]))
+
+        candidate_tokens = []
+        for result in results:
+            tokens = tokenize(result['metadata'].get('title', '') + "\n" + result['document'])
+            candidate_tokens.append((set(tokens), set(zip(tokens, tokens[1:]))))
+
+        total = len(results)
+        weights = {}
+        for term in unique_terms:
+            df = sum(1 for tokens, _ in candidate_tokens if term in tokens)
+            weights[term] = math.log(1 + (total + 1) / (df + 0.5))
+        max_weight = sum(weights.values())
+
+        scores = []
+        for result, (tokens, pairs) in zip(results, candidate_tokens):
+            coverage = sum(weight for term, weight in weights.items() if term in tokens) / max_weight
+            phrase = len(bigrams & pairs) / len(bigrams) if bigrams else 0.0
+            lexical = 0.8 * coverage + 0.2 * phrase
+            scores.append(VECTOR_WEIGHT * vector_similarity(result) + (1 - VECTOR_WEIGHT) * lexical)
+        return scores
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs with a local sentence-transformers cross-encoder.
+    Pairs are scored in batches and scoring stops (returning None) once the
+    time.monotonic() `deadline` has passed, so an abandoned run frees its thread.
+    """
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name, batch_size=None):
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size or RERANK_BATCH_SIZE
+
+    def score(self, query, results, deadline=None):
+        pairs = [(query, result['document']) for result in results]
+        scores = []
+        for start in range(0, len(pairs), self.batch_size):
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            scores.extend(float(score) for score in self.model.predict(pairs[start:start + self.batch_size]))
+        return scores
+
+def create_reranker():
+    """The cross-encoder when RERANK_MODEL is set and loadable, otherwise the lexical scorer"""
+    if RERANK_MODEL:
+        try:
+            reranker = CrossEncoderReranker(RERANK_MODEL)
+            print(f"Loaded re-ranking model {RERANK_MODEL}")
+            return reranker
+        except Exception as e:
+            print(f"Error loading re-ranking model {RERANK_MODEL}, using lexical re-ranking: {str(e)}")
+    return LexicalReranker()
+
+def rerank_results(reranker, query, results, n_results, deadline=None):
+    """Order results by the re-ranker's scores and keep the best n_results.
+    Returns None when the re-ranker ran past the deadline."""
+    scores = reranker.score(query, results, deadline)
+    if scores is None:
+        return None
+    ranked = sorted(zip(scores, range(len(results))), key=lambda pair: pair[0], reverse=True)
+    reranked = []
+    for score, i in ranked[:n_results]:
+        result = dict(results[i])
+        result['rerank_score'] = score
+        reranked.append(result)
+    return reranked
@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import math
+import numpy as np
+from filters import matches_filter, FilterCache
+
+RRF_K = 60
+
+def result_key(result):
+    """Identify the chunk behind a formatted result across different searches"""
+    metadata = result.get('metadata') or {}
+    if 'id_parent' in metadata and 'chunk_index' in metadata:
+        # Parent ids are only unique within one tech stack's corpus
+        return (result.get('tech_stack'), metadata['id_parent'], metadata['chunk_index'])
+    return result['document']
+
+def vector_similarity(result, default=0.0):
+    """The result's vector similarity; keyword-only hits have none and get `default`"""
+    score = result.get('similarity_score')
+    return default if score is None else score
+
+def reciprocal_rank_fusion(result_lists, n_results, k=RRF_K):
+    """Merge ranked lists of formatted results with reciprocal rank fusion.
+    A chunk scores sum(1 / (k + rank)) over the lists it appears in, returned
+    as its fusion_score; the copy with the best similarity_score is kept,
+    along with the best keyword_score of any copy.
+    """
+    scores = {}
+    best = {}
+    keyword_scores = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            key = result_key(result)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in best or vector_similarity(result, float('-inf')) > vector_similarity(best[key], float('-inf')):
+                best[key] = result
+            if result.get('keyword_score') is not None:
+                keyword_scores[key] = max(keyword_scores.get(key, 0.0), result['keyword_score'])
+
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)
+    fused = []
+    for key in ranked[:n_results]:
+        result = dict(best[key])
+        result['fusion_score'] = scores[key]
+        if key in keyword_scores:
+            result['keyword_score'] = keyword_scores[key]
+        fused.append(result)
+    return fused
+
+# Fuse BM25 keyword matches with the vector results when a keyword index is available
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+KEYWORD_INDEX_PATH = os.getenv("KEYWORD_INDEX_PATH", "keyword_index")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Keeps identifiers like golem-cli, --component-name or wasi:http together
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[-.:/][a-z0-9_]+)*")
+
+def tokenize(text):
+    """Lowercased word tokens; compound identifiers are kept whole and also split into parts"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in re.split(r"[-.:/]", token) if part)
+    return tokens
+
+class BM25Index:
+    """In-process BM25 keyword index over the ingested chunks.
+
+    Postings are stored as two flat arrays (chunk numbers and precomputed
+    BM25 term weights) with a vocabulary mapping each term to its slice, so
+    a query is a handful of vectorized adds into one score array.
+    """
+
+    def __init__(self, vocabulary, doc_ids, weights, records):
+        self.vocabulary = vocabulary
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.records = records
+        self.filter_masks = FilterCache(self._mask_for)
+
+    @classmethod
+    def build(cls, chunks, k1=BM25_K1, b=BM25_B):
+        """Build from the chunk dicts produced by ingest.build_chunks"""
+        term_frequencies = []
+        lengths = []
+        document_frequency = {}
+        for chunk in chunks:
+            counts = {}
+            # The title is part of what the chunk is about, as it is for the embedding
+            for token in tokenize(chunk['title'] + "\n" + chunk['text']):
+                counts[token] = counts.get(token, 0) + 1
+            term_frequencies.append(counts)
+            lengths.append(sum(counts.values()))
+            for token in counts:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+
+        total = len(chunks)
+        average_length = (sum(lengths) / total) if total else 0.0
+        postings = {}
+        for doc_id, counts in enumerate(term_frequencies):
+            norm = k1 * (1 - b + b * lengths[doc_id] / average_length) if average_length else k1
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((doc_id, tf * (k1 + 1) / (tf + norm)))
+
+        vocabulary = {}
+        doc_ids = []
+        weights = []
+        for token in sorted(postings):
+            df = document_frequency[token]
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            vocabulary[token] = (len(doc_ids), len(postings[token]))
+            for doc_id, weight in postings[token]:
+                doc_ids.append(doc_id)
+                weights.append(idf * weight)
+
+        records = [{"id": chunk['id'], "document": chunk['text'], "metadata": chunk['metadata']} for chunk in chunks]
+        return cls(vocabulary, np.array(doc_ids, dtype=np.int32), np.array(weights, dtype=np.float32), records)
+
+    def save(self, path=KEYWORD_INDEX_PATH):
+        os.makedirs(path, exist_ok=True)
+        np.savez(os.path.join(path, "postings.npz"), doc_ids=self.doc_ids, weights=self.weights)
+        with open(os.path.join(path, "index.json"), 'w', encoding='utf-8') as file:
+            json.dump({"vocabulary": self.vocabulary, "records": self.records}, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path=KEYWORD_INDEX_PATH):
+        postings = np.load(os.path.join(path, "postings.npz"))
+        with open(os.path.join(path, "index.json"), 'r', encoding='utf-8') as file:
+            index = json.load(file)
+        vocabulary = {token: tuple(span) for token, span in index["vocabulary"].items()}
+        return cls(vocabulary, postings["doc_ids"], postings["weights"], index["records"])
+
+    def _mask_for(self, search_filter):
+        return np.array([matches_filter(record['metadata'], search_filter) for record in self.records], dtype=bool)
+
+    def search(self, query, n_results, search_filter=None):
+        """Return formatted results for the best BM25 matches of the query"""
+        scores = np.zeros(len(self.records), dtype=np.float32)
+        matched = False
+        for token in set(tokenize(query)):
+            span = self.vocabulary.get(token)
+            if span is None:
+                continue
+            start, length = span
+            np.add.at(scores, self.doc_ids[start:start + length], self.weights[start:start + length])
+            matched = True
+        if not matched:
+            return []
+        if search_filter:
+            scores[~self.filter_masks.get(search_filter)] = 0
+
+        n_results = min(n_results, int(np.count_nonzero(scores)))
+        top = np.argpartition(-scores, n_results - 1)[:n_results]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            {
+                'document': self.records[i]['document'],
+                'metadata': self.records[i]['metadata'],
+                # Keyword-only hits have no vector similarity
+                'similarity_score': None,
+                'keyword_score': float(scores[i])
+            }
+            for i in top
+        ]
+
+def keyword_index_path_for(collection_name):
+    """Each collection gets its own keyword index directory"""
+    return os.path.join(KEYWORD_INDEX_PATH, collection_name)
+
+def load_keyword_index(path=KEYWORD_INDEX_PATH):
+    """Load the BM25 index if doc0-index has written one, otherwise None"""
+    if not os.path.exists(os.path.join(path, "index.json")):
+        print(f"Keyword index {path} not found, using vector search only")
+        return None
+    try:
+        index = BM25Index.load(path)
+    except Exception as e:
+        print(f"Error loading keyword index {path}: {str(e)}")
+        return None
+    print(f"Loaded keyword index from {path} with {len(index.records)} chunks and {len(index.vocabulary)} terms")
+    return index
@@ -0,0 +1,382 @@
+import os
+import asyncio
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from google.genai.types import EmbedContentConfig
+from ingest import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, MAX_BATCH_SIZE
+from retrieval import reciprocal_rank_fusion, vector_similarity
+from rerank import rerank_results, RERANK_CANDIDATES, RERANK_BUDGET_MS, RERANK_THREADS
+from context import pack_context
+
+GENERATION_MODEL = "gemini-2.0-flash"
+
+# Chroma's HttpClient is synchronous, so vector store calls run on this many threads
+CHROMA_THREADPOOL_SIZE = int(os.getenv("CHROMA_THREADPOOL_SIZE", "32"))
+
+# Raw-query results scoring at least this well skip the Gemini query rewrite in speculative mode
+SKIP_ENHANCE_THRESHOLD = float(os.getenv("SKIP_ENHANCE_THRESHOLD", "0.75"))
+
+# How long a fetched collection version is trusted before asking Chroma again
+COLLECTION_VERSION_TTL = int(os.getenv("COLLECTION_VERSION_TTL", "30"))
+
+def format_query_results(results, query_index=0):
+    """Flatten one query of a Chroma result into a list of result dicts"""
+    formatted_results = []
+    if results['documents'] and len(results['documents']) > query_index and results['documents'][query_index]:
+        for i in range(len(results['documents'][query_index])):
+            formatted_results.append({
+                'document': results['documents'][query_index][i],
+                'metadata': results['metadatas'][query_index][i],
+                'similarity_score': 1 - results['distances'][query_index][i]
+            })
+    return formatted_results
+
+def build_enhance_prompt(query):
+    return f"""
+            You are a search query enhancer for Golem documentation search system.
+            Your task is to improve the user's search query to make it more effective for semantic search in a vector database.
+
+            Original query: "{query}"
+
+            Enhance this query by:
+            1. Expanding the user query to make it more accurate in vector database search
+            2. Expanding abbreviations like 'CLI' to 'Command Line Interface'
+            3. Including synonyms for technical terms
+            4. Improving specificity while maintaining the original intent
+
+            Return ONLY the enhanced query text with no explanations or additional text.
+            """
+
+def build_summary_prompt(query, formatted_results):
+    # Format the results into a structured text for Gemini
+    formatted_content = ""
+    for index, result in enumerate(formatted_results):
+        # Keyword-only matches have no vector similarity to report
+        if result.get('similarity_score') is None:
+            score = "Keyword match"
+        else:
+            score = f"{(result['similarity_score'] * 100):.1f}%"
+        formatted_content += f"""
+Document {index + 1}: {result['metadata']['title']}
+Content: {result['document']}
+URL: {result['metadata']['url']}
+Similarity Score: {score}
+"""
+
+    return f"""
+You are a technical documentation assistant for Golem. Your task is to answer the user's question using the provided documentation snippets.
+
+Follow these guidelines when creating your response:
+1. Answer the question clearly and concisely based on the documentation provided
+2. Maintain technical accuracy and use Golem terminology correctly
+3. Format your response with proper markdown for readability
+4. When referencing specific parts of the documentation, use citations like [1], [2], etc.
+5. For code examples or commands, use proper markdown code blocks with appropriate syntax highlighting
+6. At the end of your response, include a "References" section with numbered links to the source documentation
+7. IMPORTANT: In the References section, ensure each unique URL appears only once. Do not duplicate URLs.
+
+User question: {query}
+
+Here are the documentation snippets:
+{formatted_content}
+"""
+
+class SearchService:
+    """Non-blocking access to Gemini and the vector store for the request handlers.
+    Gemini calls go through the genai async client (client.aio); vector store
+    calls are offloaded to a bounded thread pool so they never block the event loop.
+    """
+
+    def __init__(self, client, vector_stores, max_workers=None, embedding_cache=None, keyword_indexes=None, reranker=None):
+        self.client = client
+        # One vector store (and optionally one keyword index) per tech stack
+        self.vector_stores = vector_stores
+        self.keyword_indexes = keyword_indexes or {}
+        self.reranker = reranker
+        self.embedding_cache = embedding_cache
+        self.versions = {}
+        self.version_locks = {stack: asyncio.Lock() for stack in vector_stores}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or CHROMA_THREADPOOL_SIZE,
+            thread_name_prefix="chroma"
+        )
+        # Re-ranking gets its own threads, so slow scoring never starves vector store calls
+        self.rerank_executor = ThreadPoolExecutor(max_workers=RERANK_THREADS, thread_name_prefix="rerank")
+
+    def resolve_stacks(self, tech_stack=None):
+        """Normalize a request's tech_stack (None, a name or a list of names) to a list of served stacks"""
+        if tech_stack is None:
+            return list(self.vector_stores)
+        stacks = [tech_stack] if isinstance(tech_stack, str) else list(tech_stack)
+        unknown = [stack for stack in stacks if stack not in self.vector_stores]
+        if unknown or not stacks:
+            raise ValueError(f"Unknown tech stack {', '.join(unknown) or '(none)'}; available: {', '.join(self.vector_stores)}")
+        return list(dict.fromkeys(stacks))
+
+    async def run_in_pool(self, func, *args, **kwargs):
+        """Run a blocking call on the vector store thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def cached_embeddings(self, keys):
+        """Cached embeddings for the keys (None for a miss). The in-process cache is
+        read inline; the rest are looked up in the shared backend on the thread pool"""
+        cache = self.embedding_cache
+        embeddings = [cache.get_local(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing and cache.shared is not None:
+            found = await self.run_in_pool(lambda: [cache.get_shared(keys[i]) for i in missing])
+            for i, embedding in zip(missing, found):
+                embeddings[i] = embedding
+        return embeddings
+
+    def cache_embeddings(self, keys, embeddings):
+        """Store embeddings in the in-process cache now and in the shared backend in the background"""
+        cache = self.embedding_cache
+        values = [cache.set_local(key, embedding) for key, embedding in zip(keys, embeddings)]
+        if cache.shared is not None:
+            self.executor.submit(lambda: [cache.set_shared(key, value) for key, value in zip(keys, values)])
+
+    async def embed(self, text, title="Golem Documentation", task_type="RETRIEVAL_DOCUMENT"):
+        cache_key = None
+        if self.embedding_cache is not None:
+            cache_key = self.embedding_cache.make_key(text, task_type, EMBEDDING_DIMENSIONS, EMBEDDING_MODEL, title)
+            cached = (await self.cached_embeddings([cache_key]))[0]
+            if cached is not None:
+                return cached
+
+        response = await self.client.aio.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=text,
+            config=EmbedContentConfig(
+                task_type=task_type,
+                output_dimensionality=EMBEDDING_DIMENSIONS,
+                title=title,
+            ),
+        )
+        embedding = response.embeddings[0].values
+
+        if cache_key is not None:
+            self.cache_embeddings([cache_key], [embedding])
+        return embedding
+
+    async def embed_many(self, texts, title="Golem Documentation", task_type="RETRIEVAL_DOCUMENT"):
+        """Embed several texts, using the cache per text and one embed_content call per 100 misses"""
+        embeddings = [None] * len(texts)
+        keys = None
+        if self.embedding_cache is not None:
+            keys = [self.embedding_cache.make_key(text, task_type, EMBEDDING_DIMENSIONS, EMBEDDING_MODEL, title)
+                    for text in texts]
+            embeddings = await self.cached_embeddings(keys)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        async def embed_batch(indexes):
+            response = await self.client.aio.models.embed_content(
+                model=EMBEDDING_MODEL,
+                contents=[texts[i] for i in indexes],
+                config=EmbedContentConfig(
+                    task_type=task_type,
+                    output_dimensionality=EMBEDDING_DIMENSIONS,
+                    title=title,
+                ),
+            )
+            return indexes, [embedding.values for embedding in response.embeddings]
+
+        batches = [missing[start:start + MAX_BATCH_SIZE] for start in range(0, len(missing), MAX_BATCH_SIZE)]
+        for indexes, values in await asyncio.gather(*(embed_batch(batch) for batch in batches)):
+            for i, embedding in zip(indexes, values):
+                embeddings[i] = embedding
+            if keys is not None:
+                self.cache_embeddings([keys[i] for i in indexes], values)
+        return embeddings
+
+    async def generate(self, prompt):
+        response = await self.client.aio.models.generate_content(
+            model=GENERATION_MODEL,
+            contents=prompt
+        )
+        return response.text
+
+    async def collection_versions(self, stacks=None):
+        """{stack: version} identifying the current contents of the searched collections,
+        each refreshed at most every COLLECTION_VERSION_TTL seconds"""
+        stacks = stacks or list(self.vector_stores)
+        versions = {}
+        for stack in stacks:
+            version, checked_at = self.versions.get(stack, (None, 0.0))
+            if version is None or time.monotonic() - checked_at > COLLECTION_VERSION_TTL:
+                # One refresh per stack at a time; requests arriving meanwhile reuse its result
+                async with self.version_locks[stack]:
+                    version, checked_at = self.versions.get(stack, (None, 0.0))
+                    if version is None or time.monotonic() - checked_at > COLLECTION_VERSION_TTL:
+                        version = await self.run_in_pool(self.vector_stores[stack].version)
+                        self.versions[stack] = (version, time.monotonic())
+            versions[stack] = version
+        return versions
+
+    async def query_stacks(self, query_embeddings, n_results, stacks, search_filter=None):
+        """Query every stack's vector store in parallel and merge each query's
+        results into one top-k by similarity (all stacks share the embedding model)"""
+        stack_results = await asyncio.gather(*(
+            self.run_in_pool(self.vector_stores[stack].query, query_embeddings, n_results, search_filter)
+            for stack in stacks
+        ))
+        merged = []
+        for i in range(len(query_embeddings)):
+            formatted_results = []
+            for stack, results in zip(stacks, stack_results):
+                for result in format_query_results(results, i):
+                    result['tech_stack'] = stack
+                    formatted_results.append(result)
+            if len(stacks) > 1:
+                formatted_results.sort(key=lambda result: result['similarity_score'], reverse=True)
+            merged.append(formatted_results[:n_results])
+        return merged
+
+    def keyword_search(self, query, n_results, stacks, search_filter=None):
+        """Top BM25 matches for the query across the stacks with a keyword index (blocking)"""
+        keyword_results = []
+        for stack in stacks:
+            if stack in self.keyword_indexes:
+                for result in self.keyword_indexes[stack].search(query, n_results, search_filter):
+                    result['tech_stack'] = stack
+                    keyword_results.append(result)
+        keyword_results.sort(key=lambda result: result['keyword_score'], reverse=True)
+        return keyword_results[:n_results]
+
+    async def keyword_search_many(self, queries, n_results, stacks, search_filter=None):
+        """Keyword matches for each query, scored on the thread pool"""
+        if not any(stack in self.keyword_indexes for stack in stacks):
+            return [[] for _ in queries]
+        return await asyncio.gather(*(
+            self.run_in_pool(self.keyword_search, query, n_results, stacks, search_filter)
+            for query in queries
+        ))
+
+    @staticmethod
+    def fuse_keyword_results(vector_results, keyword_results, n_results):
+        """Merge BM25 matches into the vector results with rank fusion"""
+        if not keyword_results:
+            return vector_results
+        return reciprocal_rank_fusion([vector_results, keyword_results], n_results)
+
+    def candidate_count(self, n_results, rerank):
+        """Over-fetch when re-ranking so the re-ranker has candidates to choose from"""
+        if rerank and self.reranker is not None:
+            return max(n_results, RERANK_CANDIDATES)
+        return n_results
+
+    async def rerank(self, query, candidates, n_results, budget_ms=None):
+        """Re-score candidates and keep the best n_results, falling back to the
+        retrieval order when re-ranking exceeds the latency budget"""
+        if self.reranker is None or len(candidates) <= 1:
+            return candidates[:n_results]
+        budget_ms = RERANK_BUDGET_MS if budget_ms is None else budget_ms
+        # The scorer checks the deadline itself, so a run that is given up on also stops
+        deadline = time.monotonic() + budget_ms / 1000
+        loop = asyncio.get_running_loop()
+        try:
+            reranked = await asyncio.wait_for(
+                loop.run_in_executor(self.rerank_executor, functools.partial(
+                    rerank_results, self.reranker, query, candidates, n_results, deadline
+                )),
+                timeout=budget_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            reranked = None
+        if reranked is None:
+            print(f"Re-ranking exceeded {budget_ms:.0f}ms budget, using retrieval order for: {query}")
+            return candidates[:n_results]
+        return reranked
+
+    async def search(self, query, n_results, stacks=None, search_filter=None, rerank=False, rerank_budget_ms=None):
+        """Embed the query and return formatted nearest neighbours across the
+        given stacks, fused with keyword matches where keyword indexes are loaded.
+        `search_filter` (see filters.py) restricts both searches to matching chunks;
+        `rerank` over-fetches candidates and re-ranks them down to n_results."""
+        stacks = stacks or list(self.vector_stores)
+        candidates = self.candidate_count(n_results, rerank)
+
+        async def vector_search():
+            query_embedding = await self.embed(query)
+            return (await self.query_stacks([query_embedding], candidates, stacks, search_filter))[0]
+
+        # BM25 scoring does not need the embedding, so it runs alongside the vector search
+        formatted_results, (keyword_results,) = await asyncio.gather(
+            vector_search(),
+            self.keyword_search_many([query], candidates, stacks, search_filter)
+        )
+        formatted_results = self.fuse_keyword_results(formatted_results, keyword_results, candidates)
+        if candidates > n_results:
+            return await self.rerank(query, formatted_results, n_results, rerank_budget_ms)
+        return formatted_results
+
+    async def search_many(self, queries, n_results, stacks=None, search_filter=None, rerank=False, rerank_budget_ms=None):
+        """Batched search: one embedding pass and a single query per stack for all queries"""
+        stacks = stacks or list(self.vector_stores)
+        candidates = self.candidate_count(n_results, rerank)
+
+        async def vector_search():
+            query_embeddings = await self.embed_many(queries)
+            return await self.query_stacks(query_embeddings, candidates, stacks, search_filter)
+
+        batch_results, keyword_batches = await asyncio.gather(
+            vector_search(),
+            self.keyword_search_many(queries, candidates, stacks, search_filter)
+        )
+        batch_results = [self.fuse_keyword_results(formatted_results, keyword_results, candidates)
+                         for formatted_results, keyword_results in zip(batch_results, keyword_batches)]
+        if candidates > n_results:
+            return await asyncio.gather(*(
+                self.rerank(query, formatted_results, n_results, rerank_budget_ms)
+                for query, formatted_results in zip(queries, batch_results)
+            ))
+        return batch_results
+
+    async def enhance_query(self, query):
+        enhanced_query = await self.generate(build_enhance_prompt(query))
+        return enhanced_query.strip()
+
+    async def speculative_search(self, query, n_results, skip_threshold=None, stacks=None, search_filter=None,
+                                 rerank=False, rerank_budget_ms=None):
+        """Search the raw query while Gemini rewrites it, then fuse both result lists.
+
+        Returns (enhanced_query, formatted_results, enhancement_skipped). When the
+        best raw result already scores at or above `skip_threshold` the rewrite is
+        cancelled and the raw results are used as they are.
+        """
+        skip_threshold = SKIP_ENHANCE_THRESHOLD if skip_threshold is None else skip_threshold
+        enhance_task = asyncio.create_task(self.enhance_query(query))
+        try:
+            raw_results = await self.search(query, n_results, stacks, search_filter, rerank, rerank_budget_ms)
+        except Exception:
+            enhance_task.cancel()
+            raise
+
+        # Keyword-only hits carry no similarity, so look at the best vector score
+        if raw_results and max(vector_similarity(result) for result in raw_results) >= skip_threshold:
+            enhance_task.cancel()
+            return query, raw_results, True
+
+        enhanced_query = await enhance_task
+        enhanced_results = await self.search(enhanced_query, n_results, stacks, search_filter, rerank, rerank_budget_ms)
+        return enhanced_query, reciprocal_rank_fusion([enhanced_results, raw_results], n_results), False
+
+    async def summarize(self, query, formatted_results):
+        # Adjacent chunks are merged, near-duplicates dropped and the rest fitted to the token budget
+        return await self.generate(build_summary_prompt(query, pack_context(formatted_results)))
+
+    async def summarize_stream(self, query, formatted_results):
+        """Yield summary text pieces as Gemini generates them"""
+        stream = await self.client.aio.models.generate_content_stream(
+            model=GENERATION_MODEL,
+            contents=build_summary_prompt(query, pack_context(formatted_results))
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        self.rerank_executor.shutdown(wait=False)
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+from ingest import COLLECTION_NAME
+from collection_scan import CollectionScan, scan_ids, SCAN_PAGE_SIZE
+from filters import chroma_where, matches_filter, FilterCache
+from collection_stats import load_content_version
+
+# "chroma" queries the remote Chroma server, "local" searches an exported in-process index
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "local_index")
+
+# How long the parent id -> URL map used for URL prefix filters is reused
+FILTER_CATALOG_TTL = int(os.getenv("FILTER_CATALOG_TTL", "300"))
+
+def local_index_path_for(collection_name):
+    """Each collection is exported to its own directory under LOCAL_INDEX_PATH"""
+    return os.path.join(LOCAL_INDEX_PATH, collection_name)
+
+def ids_digest(ids):
+    # Chunk ids embed a content hash, so hashing the id set fingerprints the contents
+    return hashlib.sha256("\n".join(sorted(ids)).encode('utf-8')).hexdigest()[:16]
+
+class ChromaVectorStore:
+    """Vector search through a collection on the Chroma server"""
+
+    def __init__(self, chroma_client, collection_name=COLLECTION_NAME):
+        self.chroma_client = chroma_client
+        self.collection_name = collection_name
+        self.parent_urls = None
+        self.parent_urls_loaded_at = 0.0
+
+    def get_parent_urls(self, collection):
+        """{id_parent: url} for the collection, rebuilt at most every FILTER_CATALOG_TTL seconds"""
+        if self.parent_urls is None or time.monotonic() - self.parent_urls_loaded_at > FILTER_CATALOG_TTL:
+            parent_urls = {}
+            for _, metadata, _ in CollectionScan(collection, include=['metadatas']).records():
+                metadata = metadata or {}
+                parent_urls.setdefault(str(metadata.get('id_parent')), metadata.get('url', ''))
+            self.parent_urls = parent_urls
+            self.parent_urls_loaded_at = time.monotonic()
+        return self.parent_urls
+
+    def query(self, query_embeddings, n_results, search_filter=None):
+        collection = self.chroma_client.get_collection(self.collection_name)
+        parent_urls = self.get_parent_urls(collection) if search_filter and 'url_prefix' in search_filter else None
+        where, empty = chroma_where(search_filter, parent_urls)
+        if empty:
+            return {key: [[] for _ in query_embeddings] for key in ('ids', 'documents', 'metadatas', 'distances')}
+        # The where clause restricts the candidates before Chroma scores them
+        return collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=['documents', 'metadatas', 'distances']
+        )
+
+    def count(self):
+        return self.chroma_client.get_collection(self.collection_name).count()
+
+    def version(self):
+        """Read from the stamp ingest saves with the statistics, without touching the chunks"""
+        collection = self.chroma_client.get_collection(self.collection_name)
+        stamp = load_content_version(self.chroma_client, self.collection_name)
+        if stamp is None:
+            # Collections loaded before the stamp existed are fingerprinted by their ids
+            stamp = ids_digest(scan_ids(collection))
+        return f"{collection.id}:{stamp}"
+
+class LocalVectorStore:
+    """Exact cosine search over an exported index held in-process.
+
+    The index directory holds embeddings.npy (a row-normalized float32
+    matrix opened memory-mapped), records.jsonl (id, document and metadata
+    per row) and meta.json. A query is a single matrix-vector product
+    followed by a partial sort for the top k.
+    """
+
+    def __init__(self, path=LOCAL_INDEX_PATH):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as file:
+            self.meta = json.load(file)
+        self.matrix = np.load(os.path.join(path, "embeddings.npy"), mmap_mode='r')
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        with open(os.path.join(path, "records.jsonl"), 'r', encoding='utf-8') as file:
+            for line in file:
+                record = json.loads(line)
+                self.ids.append(record['id'])
+                self.documents.append(record['document'])
+                self.metadatas.append(record['metadata'])
+        # Row numbers matching each recently used filter
+        self.filter_rows = FilterCache(self._rows_for)
+        print(f"Loaded local vector index from {path} with {len(self.ids)} records")
+
+    def _rows_for(self, search_filter):
+        return np.array(
+            [i for i, metadata in enumerate(self.metadatas) if matches_filter(metadata, search_filter)],
+            dtype=np.int64
+        )
+
+    def _top_k(self, scores, n_results):
+        n_results = min(n_results, len(scores))
+        if n_results <= 0:
+            return np.array([], dtype=np.int64)
+        if n_results < len(scores):
+            top = np.argpartition(-scores, n_results - 1)[:n_results]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind='stable')]
+
+    def query(self, query_embeddings, n_results, search_filter=None):
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        # Only the rows passing the filter are scored
+        rows = self.filter_rows.get(search_filter) if search_filter else None
+        matrix = self.matrix if rows is None else self.matrix[rows]
+
+        for scores in queries @ matrix.T if len(matrix) else [np.array([])] * len(queries):
+            top = self._top_k(scores, n_results)
+            records = top if rows is None else rows[top]
+            results['ids'].append([self.ids[i] for i in records])
+            results['documents'].append([self.documents[i] for i in records])
+            results['metadatas'].append([self.metadatas[i] for i in records])
+            # Same cosine distance Chroma reports for an "hnsw:space": "cosine" collection
+            results['distances'].append([float(1 - scores[i]) for i in top])
+        return results
+
+    def count(self):
+        return len(self.ids)
+
+    def version(self):
+        return f"local:{self.meta['version']}"
+
+def export_local_index(chroma_client, path=None, collection_name=COLLECTION_NAME, page_size=SCAN_PAGE_SIZE):
+    """Write a Chroma collection out as a local index directory"""
+    path = path or local_index_path_for(collection_name)
+    collection = chroma_client.get_collection(collection_name)
+    os.makedirs(path, exist_ok=True)
+
+    vectors = []
+    ids = []
+    scan = CollectionScan(
+        collection,
+        include=['embeddings', 'documents', 'metadatas'],
+        page_size=page_size,
+        label="Exported"
+    )
+    with open(os.path.join(path, "records.jsonl.tmp"), 'w', encoding='utf-8') as file:
+        for page in scan:
+            for i, record_id in enumerate(page['ids']):
+                ids.append(record_id)
+                vectors.append(np.asarray(page['embeddings'][i], dtype=np.float32))
+                file.write(json.dumps({
+                    "id": record_id,
+                    "document": page['documents'][i],
+                    "metadata": page['metadatas'][i]
+                }, ensure_ascii=False) + "\n")
+    print(scan.summary())
+
+    matrix = np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    if len(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+    with open(os.path.join(path, "embeddings.npy.tmp"), 'wb') as file:
+        np.save(file, matrix.astype(np.float32))
+    os.replace(os.path.join(path, "embeddings.npy.tmp"), os.path.join(path, "embeddings.npy"))
+    os.replace(os.path.join(path, "records.jsonl.tmp"), os.path.join(path, "records.jsonl"))
+    with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as file:
+        json.dump({
+            "collection": collection_name,
+            "records": len(ids),
+            "dimensions": int(matrix.shape[1]) if len(matrix) else 0,
+            "version": ids_digest(ids)
+        }, file)
+    print(f"Local vector index written to {path}")
+    return len(ids)
+
+def create_vector_store(chroma_client=None, collection_name=COLLECTION_NAME):
+    """Build the backend selected by VECTOR_STORE for one collection"""
+    if VECTOR_STORE == "local":
+        return LocalVectorStore(local_index_path_for(collection_name))
+    if VECTOR_STORE == "chroma":
+        return ChromaVectorStore(chroma_client, collection_name)
+    raise ValueError(f"Unknown VECTOR_STORE {VECTOR_STORE}, expected 'chroma' or 'local'")
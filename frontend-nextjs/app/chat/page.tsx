@@ -7,7 +7,7 @@ import { MessageList } from '@/components/message-list';
 import { SummaryResults } from '@/components/summary-results';
 import { PanelLeftOpen, PanelLeftClose, MessageSquarePlus, Search, Menu, X, Home } from 'lucide-react';
 import { Chat, Message, generateSyntheticResponse, generateChatTitle } from '@/lib/chat-store';
-import { SearchResult } from '@/lib/api-service';
+import { SearchResult, formatMatch } from '@/lib/api-service';
 import { useSearchStore } from '@/lib/store';
 import Link from 'next/link';
 import { AuroraBackground } from '@/components/ui/aurora-background';
@@ -409,8 +409,7 @@ export default function ChatPage() {
     let references = `## References\n\n`;
     
     results.forEach((result, index) => {
-      const score = (result.similarity_score * 100).toFixed(1);
-      fallback += `## ${index + 1}. ${result.metadata.title} (${score}% match) [[${index + 1}]](#reference-${index + 1})\n\n`;
+      fallback += `## ${index + 1}. ${result.metadata.title} (${formatMatch(result)}) [[${index + 1}]](#reference-${index + 1})\n\n`;
       
       fallback += `- **Version**: ${result.metadata.version_or_commonresource}\n`;
       fallback += `- **Source**: [View Documentation [${index + 1}]](${result.metadata.url})\n\n`;
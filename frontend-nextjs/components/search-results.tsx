@@ -1,5 +1,5 @@
 import React from 'react';
-import { SearchResult } from '@/lib/api-service';
+import { SearchResult, formatMatch } from '@/lib/api-service';
 import ReactMarkdown from 'react-markdown';
 
 interface SearchResultsProps {
@@ -33,7 +33,7 @@ export function SearchResults({ results, isLoading }: SearchResultsProps) {
                 {result.metadata.title}
               </h3>
               <span className="text-sm px-2 py-1 bg-blue-900/50 rounded-full text-blue-300">
-                {(result.similarity_score * 100).toFixed(1)}% match
+                {formatMatch(result)}
               </span>
             </div>
             
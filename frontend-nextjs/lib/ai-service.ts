@@ -1,6 +1,6 @@
 import { createGoogleGenerativeAI } from '@ai-sdk/google';
 import { generateText, streamText } from 'ai';
-import { SearchResult } from './api-service';
+import { SearchResult, formatMatch } from './api-service';
 
 // Create a Google provider instance with server-side API key
 const createAIProvider = () => {
@@ -66,7 +66,7 @@ Document ${index + 1}: ${result.metadata.title}
 Content: ${result.document}
 URL: ${result.metadata.url}
 Version: ${result.metadata.version_or_commonresource}
-Similarity Score: ${(result.similarity_score * 100).toFixed(1)}%
+Match: ${formatMatch(result)}
 `;
     }).join("\n");
 
@@ -132,8 +132,7 @@ function generateFallbackSummary(results: SearchResult[]): string {
   summary += `> **Note:** The summary generation is currently unavailable. Showing raw results from the documentation.\n\n`;
   
   results.forEach((result, index) => {
-    const score = (result.similarity_score * 100).toFixed(1);
-    summary += `## ${index + 1}. ${result.metadata.title} (${score}% match)\n\n`;
+    summary += `## ${index + 1}. ${result.metadata.title} (${formatMatch(result)})\n\n`;
     
     // Add key information
     summary += `- **Version**: ${result.metadata.version_or_commonresource}\n`;
@@ -11,7 +11,17 @@ export interface SearchResult {
     chunk_index?: string;
     total_chunks?: string;
   };
-  similarity_score: number;
+  // null for keyword-only matches, which have no vector similarity
+  similarity_score: number | null;
+  keyword_score?: number;
+  fusion_score?: number;
+}
+
+export function formatMatch(result: SearchResult): string {
+  if (result.similarity_score === null || result.similarity_score === undefined) {
+    return 'keyword match';
+  }
+  return `${(result.similarity_score * 100).toFixed(1)}% match`;
 }
 
 export interface SearchResponse {
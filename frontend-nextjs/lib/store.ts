@@ -1,5 +1,5 @@
 import { create } from 'zustand';
-import { SearchResult, searchDocumentation } from './api-service';
+import { SearchResult, searchDocumentation, formatMatch } from './api-service';
 import { summarizeResults, enhanceQuery } from './ai-service';
 
 interface SearchState {
@@ -134,8 +134,7 @@ export const useSearchStore = create<SearchState>((set, get) => ({
           fallbackSummary += `**Your query:** ${query}\n\n`;
           
           response.results.forEach((result, index) => {
-            const score = (result.similarity_score * 100).toFixed(1);
-            fallbackSummary += `## ${index + 1}. ${result.metadata.title} (${score}% match)\n\n`;
+            fallbackSummary += `## ${index + 1}. ${result.metadata.title} (${formatMatch(result)})\n\n`;
             
             fallbackSummary += `- **Version**: ${result.metadata.version_or_commonresource}\n`;
             fallbackSummary += `- **Source**: [${index + 1}](${result.metadata.url})\n\n`;